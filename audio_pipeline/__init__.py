@@ -0,0 +1,34 @@
+"""
+Shared audio pipeline for the tingxie TTS download scripts.
+
+See AUDIO_PIPELINE.md for an overview.
+"""
+
+from .cache import AudioCache
+from .engine import (
+    FetchEngine,
+    FetchJob,
+    FetchResult,
+    TokenBucket,
+    print_summary,
+    run_jobs,
+)
+from .mp3 import Mp3Info, probe_file
+from .providers import PROVIDERS, ProviderError, Utterance, get_provider, register_provider
+
+__all__ = [
+    'AudioCache',
+    'FetchEngine',
+    'FetchJob',
+    'FetchResult',
+    'Mp3Info',
+    'PROVIDERS',
+    'ProviderError',
+    'TokenBucket',
+    'Utterance',
+    'get_provider',
+    'print_summary',
+    'probe_file',
+    'register_provider',
+    'run_jobs',
+]
@@ -0,0 +1,406 @@
+"""
+Word clips cut from sentence and passage audio instead of being fetched.
+
+Most vocabulary words are already spoken somewhere in audio we have: the
+school dictation sentences, the CC1 paragraphs and the P3HCL reading
+recordings. Each of those is a Recording: an audio file plus either its
+text, Whisper segments ([start, end, text]) or Whisper word timings. A
+Recording is aligned once to a per-character timeline:
+
+- word timings are used as they are (multi-character words split evenly)
+- otherwise the speech (each Whisper segment separately) is first split
+  into its phrases at the longest pauses, one pause per punctuation mark,
+  and each phrase is cut into as many syllables as it has characters -
+  Mandarin is one syllable per character. Pauses split a phrase first; the
+  remaining syllables are separated at the deepest dips of the smoothed
+  10 ms energy envelope. If the pieces can't be made to match the character
+  count, or come out implausibly uneven, the recording is not used.
+
+Timelines are cached in .audio_cache/alignments.json by audio hash and text.
+With slicer=True the engine asks the Slicer for every short utterance
+before going to the network: if a phrase of a recording (a Whisper segment
+or the text between two punctuation marks) contains the word, its
+characters are cut out (bounded by the neighbouring syllables), faded,
+time-stretched from the recording's speed to the one requested and encoded,
+unless its length is implausible for its syllable count (a misalignment),
+in which case the word is fetched as usual. The voice is the recording's, so a word cut from a reading passage is read
+by the teacher rather than the TTS voice.
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from . import pcm
+from .cache import sha256_bytes
+from .flight import file_lock
+from .normalize import fade
+from .paths import CACHE_DIR, ROOT
+from .providers import Utterance
+
+PUBLIC_DIR = ROOT / 'public'
+CACHE_PATH = CACHE_DIR / 'alignments.json'
+
+FRAME_MS = 10
+SILENCE_DB = -35          # frames quieter than this (relative to the peak) are pauses
+MIN_PAUSE_MS = 40         # shorter dips inside a syllable don't count as pauses
+MIN_SYLLABLE_MS = 60
+MIN_DIP_DB = 2.0          # shallowest energy dip accepted as a syllable boundary
+MAX_SPREAD = 6.0          # syllables must lie within median / MAX_SPREAD .. median * MAX_SPREAD
+PAD_MS = 40
+MIN_CHAR_MS = 120         # a cut word must last this long per character at speed 1.0 ...
+MAX_CHAR_MS = 700         # ... and no longer than this
+MIN_WORD_CHARS = 2        # a lone character matches inside too many words to be cut cleanly
+MAX_WORD_CHARS = 8        # longer utterances are sentences, not words
+
+HANZI = re.compile(r'[㐀-鿿豈-﫿]')
+PUNCTUATION = re.compile(r'[^\w\s]')
+
+# Bump when alignment or cutting changes: cached timelines and cut clips are dropped
+VERSION = 2
+
+
+class AlignError(Exception):
+    """The speech could not be matched to the text's characters."""
+
+
+def hanzi(text: str) -> str:
+    return ''.join(HANZI.findall(text))
+
+
+def phrases(text: str) -> list:
+    """Chinese characters of each run of `text` between punctuation marks."""
+    return [run for run in map(hanzi, PUNCTUATION.split(text)) if run]
+
+
+def _runs(mask: np.ndarray) -> list:
+    """[start, end) frame ranges where mask is True."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return [[int(s), int(e)] for s, e in zip(edges[0::2], edges[1::2])]
+
+
+def _envelope(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Smoothed per-frame level in dB relative to the peak."""
+    db = pcm.frame_db(samples, sample_rate, FRAME_MS)
+    return np.convolve(db, np.ones(3) / 3, mode='same') if len(db) else db
+
+
+def _voiced(smooth: np.ndarray) -> list:
+    """[start, end) frame ranges of speech, split at pauses of at least MIN_PAUSE_MS."""
+    min_pause = MIN_PAUSE_MS // FRAME_MS
+    min_syllable = MIN_SYLLABLE_MS // FRAME_MS
+    pieces = []
+    for run in _runs(smooth >= SILENCE_DB):
+        if pieces and run[0] - pieces[-1][1] < min_pause:
+            pieces[-1][1] = run[1]
+        elif run[1] - run[0] >= min_syllable // 2:
+            pieces.append(run)
+    if not pieces:
+        raise AlignError('no speech found')
+    return pieces
+
+
+def phrase_spans(samples: np.ndarray, counts: list, sample_rate: int = pcm.SAMPLE_RATE) -> list:
+    """
+    One [start, end) sample range per phrase, `counts` being their character
+    counts: the speech is split at its len(counts) - 1 longest pauses, which
+    is where the punctuation between the phrases is read.
+    """
+    if len(counts) <= 1:
+        return [(0, len(samples))]
+    pieces = _voiced(_envelope(samples, sample_rate))
+    if len(pieces) < len(counts):
+        raise AlignError(f'{len(pieces) - 1} pauses for {len(counts) - 1} punctuation marks')
+    gaps = sorted(range(len(pieces) - 1), key=lambda i: pieces[i + 1][0] - pieces[i][1], reverse=True)
+    breaks = sorted(gaps[:len(counts) - 1])
+    frame = sample_rate * FRAME_MS // 1000
+    bounds = [0] + [(pieces[i][1] + pieces[i + 1][0]) // 2 * frame for i in breaks] + [len(samples)]
+    # Each phrase's speech must fit its length, or the pauses belong elsewhere
+    starts = [pieces[0][0]] + [pieces[i + 1][0] for i in breaks]
+    ends = [pieces[i][1] for i in breaks] + [pieces[-1][1]]
+    rates = [(end - start) / count for start, end, count in zip(starts, ends, counts)]
+    if max(rates) > MAX_SPREAD * min(rates):
+        raise AlignError('phrases too uneven for their length')
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def syllable_spans(samples: np.ndarray, count: int, sample_rate: int = pcm.SAMPLE_RATE) -> list:
+    """`count` [start, end) sample ranges, one per syllable, in order."""
+    smooth = _envelope(samples, sample_rate)
+    if count <= 0 or len(smooth) == 0:
+        raise AlignError('nothing to align')
+    min_syllable = MIN_SYLLABLE_MS // FRAME_MS
+    pieces = _voiced(smooth)
+
+    # More pauses than characters (a stop closure, a breath): close the shortest gaps
+    while len(pieces) > count:
+        gaps = [pieces[i + 1][0] - pieces[i][1] for i in range(len(pieces) - 1)]
+        i = int(np.argmin(gaps))
+        pieces[i:i + 2] = [[pieces[i][0], pieces[i + 1][1]]]
+
+    # Fewer: split at the deepest dip between two energy peaks
+    while len(pieces) < count:
+        best = None
+        for p, (start, end) in enumerate(pieces):
+            for m in range(start + min_syllable, end - min_syllable):
+                if not (smooth[m] <= smooth[m - 1] and smooth[m] < smooth[m + 1]):
+                    continue
+                depth = min(smooth[start:m].max(), smooth[m + 1:end].max()) - smooth[m]
+                if best is None or depth > best[0]:
+                    best = (depth, p, m)
+        if best is None or best[0] < MIN_DIP_DB:
+            raise AlignError(f'found {len(pieces)} syllables, expected {count}')
+        _, p, m = best
+        start, end = pieces[p]
+        pieces[p:p + 1] = [[start, m], [m, end]]
+
+    lengths = np.array([end - start for start, end in pieces], dtype=np.float32)
+    median = float(np.median(lengths))
+    if lengths.max() > MAX_SPREAD * median or lengths.min() * MAX_SPREAD < median:
+        raise AlignError('syllable lengths too uneven to trust')
+    frame = sample_rate * FRAME_MS // 1000
+    return [(start * frame, end * frame) for start, end in pieces]
+
+
+def align_chars(samples: np.ndarray, text: str, offset_ms: int = 0,
+                sample_rate: int = pcm.SAMPLE_RATE) -> list:
+    """
+    [char, start_ms, end_ms] for each Chinese character of `text` spoken in
+    `samples`, each phrase aligned on its own (see phrase_spans).
+    """
+    runs = phrases(text)
+    if not runs:
+        raise AlignError('nothing to align')
+    chars = []
+    for run, (first, last) in zip(runs, phrase_spans(samples, [len(run) for run in runs], sample_rate)):
+        spans = syllable_spans(samples[first:last], len(run), sample_rate)
+        chars.extend([char, offset_ms + (first + start) * 1000 // sample_rate,
+                      offset_ms + (first + end) * 1000 // sample_rate]
+                     for char, (start, end) in zip(run, spans))
+    return chars
+
+
+def chars_from_words(words: list) -> list:
+    """Character timeline from Whisper word timings ({'word', 'start', 'end'} in seconds)."""
+    chars = []
+    for word in words:
+        text = hanzi(word['word'])
+        if not text:
+            continue
+        start, end = word['start'] * 1000, word['end'] * 1000
+        step = (end - start) / len(text)
+        chars.extend([char, round(start + i * step), round(start + (i + 1) * step)]
+                     for i, char in enumerate(text))
+    return chars
+
+
+@dataclass
+class Recording:
+    """Audio containing known text; `segments` or `words` come from Whisper."""
+    name: str
+    audio: Path
+    text: str = ''
+    segments: list = field(default_factory=list)    # [{'start', 'end', 'text'}] in seconds
+    words: list = field(default_factory=list)       # [{'word', 'start', 'end'}] in seconds
+    speed: float = 1.0
+    lang: str = 'zh-CN'
+
+    def phrases(self) -> list:
+        """
+        Chinese characters in the order the timeline will list them, without
+        aligning, split where the speech may pause: at segment boundaries and
+        punctuation.
+        """
+        if self.words:
+            runs = ['']
+            for word in self.words:
+                runs[-1] += hanzi(word['word'])
+                if PUNCTUATION.search(word['word']):
+                    runs.append('')
+            return [run for run in runs if run]
+        if self.segments:
+            return [run for segment in self.segments for run in phrases(segment['text'])]
+        return phrases(self.text)
+
+    def spoken(self) -> str:
+        return ''.join(self.phrases())
+
+    def timeline(self, samples: np.ndarray) -> list:
+        if self.words:
+            return chars_from_words(self.words)
+        if not self.segments:
+            return align_chars(samples, self.text)
+        chars = []
+        for segment in self.segments:
+            start = int(segment['start'] * pcm.SAMPLE_RATE)
+            end = int(segment['end'] * pcm.SAMPLE_RATE)
+            try:
+                chars.extend(align_chars(samples[start:end], segment['text'], round(segment['start'] * 1000)))
+            except AlignError:
+                # Keep the other segments usable; these characters just can't be cut
+                chars.extend([char, None, None] for char in hanzi(segment['text']))
+        return chars
+
+
+def default_recordings() -> list:
+    """Every sentence and passage recording the site ships with known text."""
+    recordings = []
+
+    with open(PUBLIC_DIR / 'data' / 'tingxie' / 'school_vocabulary.json', 'r', encoding='utf-8') as f:
+        school = json.load(f)
+    for row in school['vocabulary']:
+        for item in row.get('items', []):
+            if item.get('type') == 'sentence' and item.get('audio'):
+                # download_school_audio.py fetches these at speed 0.5
+                recordings.append(Recording(item['audio'], PUBLIC_DIR / item['audio'],
+                                            item['sentence'], speed=0.5))
+
+    with open(ROOT / 'cc1_audio_texts.json', 'r', encoding='utf-8') as f:
+        paragraphs = json.load(f)['paragraphs']
+    timing = {}
+    cc1_timing = PUBLIC_DIR / 'data' / 'cc1_audio_timing.json'
+    if cc1_timing.exists():
+        with open(cc1_timing, 'r', encoding='utf-8') as f:
+            timing = json.load(f)['paragraphs']
+    for key, text in paragraphs.items():
+        # Stitched paragraphs are aligned sentence by sentence (see chunker.py)
+        segments = [{'start': s['start_ms'] / 1000, 'end': s['end_ms'] / 1000, 'text': s['text']}
+                    for s in timing.get(key, [])]
+        recordings.append(Recording(f'cc1/{key}', PUBLIC_DIR / 'audio' / 'cc1' / f'{key}.mp3',
+                                    text, segments=segments))
+
+    for path in sorted((PUBLIC_DIR / 'data').glob('p3hcl_reading_*_timing.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            timing = json.load(f)
+        recordings.append(Recording(path.stem, PUBLIC_DIR / timing['audio'].lstrip('/'),
+                                    segments=timing['whisperSegments']))
+
+    for path in sorted((PUBLIC_DIR / 'audio' / 'koushi').glob('*_timing.json')):
+        if path.stem.endswith('_formatted_timing'):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            timing = json.load(f)
+        audio = path.with_name(path.name[:-len('_timing.json')] + '.mp4')
+        if timing.get('words'):
+            recordings.append(Recording(path.stem, audio, words=timing['words']))
+
+    return [r for r in recordings if r.audio.exists()]
+
+
+class Slicer:
+    """Finds words inside Recordings and cuts them out."""
+
+    def __init__(self, recordings: Optional[list] = None, cache_path: Path = CACHE_PATH):
+        self.recordings = default_recordings() if recordings is None else recordings
+        self.cache_path = Path(cache_path)
+        self._alignments = self._read()
+        self._added = {}
+        self._phrases = {id(r): r.phrases() for r in self.recordings}
+        self._spoken = {id(r): ''.join(self._phrases[id(r)]) for r in self.recordings}
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def matches(self, utterance: Utterance):
+        """
+        (recording, character index) of every recording that says the
+        utterance's text within one phrase; a match across a pause or a
+        segment boundary would cut the ends of two different words.
+        """
+        word = hanzi(utterance.text)
+        if not MIN_WORD_CHARS <= len(word) <= MAX_WORD_CHARS or word != utterance.text.strip():
+            return
+        for recording in self.recordings:
+            # A recording that is nothing but the word is the clip itself, not a source
+            if recording.lang != utterance.lang or len(word) >= len(self._spoken[id(recording)]):
+                continue
+            offset = 0
+            for phrase in self._phrases[id(recording)]:
+                at = phrase.find(word)
+                if at >= 0:
+                    yield recording, offset + at
+                    break
+                offset += len(phrase)
+
+    def covers(self, utterance: Utterance) -> bool:
+        return next(self.matches(utterance), None) is not None
+
+    def _load(self, recording: Recording) -> tuple:
+        """(samples, timeline or None); decodes once per recording."""
+        with self._lock:
+            return self._load_locked(recording)
+
+    def _load_locked(self, recording: Recording) -> tuple:
+        if id(recording) not in self._samples:
+            data = recording.audio.read_bytes()
+            source = json.dumps([recording.text, recording.segments, recording.words], ensure_ascii=False)
+            key = f"{sha256_bytes(data)}:{sha256_bytes(source.encode('utf-8'))[:16]}"
+            try:
+                samples = pcm.decode(data)
+            except (pcm.DecodeError, OSError):
+                # Report it once; the recording is skipped from then on
+                self._samples[id(recording)] = (None, None)
+                raise
+            if key not in self._alignments:
+                try:
+                    self._added[key] = recording.timeline(samples)
+                except AlignError:
+                    self._added[key] = None
+                self._alignments[key] = self._added[key]
+            self._samples[id(recording)] = (samples, self._alignments[key])
+        return self._samples[id(recording)]
+
+    def cut(self, utterance: Utterance) -> Optional[bytes]:
+        """MP3 of the utterance cut from a recording, or None if no recording covers it."""
+        from .stretch import time_stretch
+
+        word = hanzi(utterance.text)
+        for recording, at in self.matches(utterance):
+            samples, chars = self._load(recording)
+            if not chars or len(chars) != len(self._spoken[id(recording)]):
+                continue
+            if any(char[1] is None for char in chars[at:at + len(word)]):
+                continue
+            before = chars[at - 1][2] if at > 0 else None
+            after = chars[at + len(word)][1] if at + len(word) < len(chars) else None
+            # Pad into the surrounding silence, never into the neighbouring syllables
+            start = chars[at][1] - PAD_MS
+            end = chars[at + len(word) - 1][2] + PAD_MS
+            start = max(start, before if before is not None else start, 0)
+            end = min(end, after if after is not None else end)
+            # A word much shorter or longer than its syllables take to say was misaligned
+            per_char_ms = (chars[at + len(word) - 1][2] - chars[at][1]) * recording.speed / len(word)
+            if not MIN_CHAR_MS <= per_char_ms <= MAX_CHAR_MS:
+                continue
+            clip = samples[start * pcm.SAMPLE_RATE // 1000:end * pcm.SAMPLE_RATE // 1000]
+            clip = fade(clip)
+            if utterance.speed != recording.speed:
+                clip = time_stretch(clip, utterance.speed / recording.speed)
+            return pcm.encode(clip)
+        return None
+
+    def _read(self) -> dict:
+        if not self.cache_path.exists():
+            return {}
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached['entries'] if cached.get('version') == VERSION else {}
+
+    def save(self):
+        """Write new alignments, keeping those other runs saved meanwhile."""
+        with self._lock:
+            added, self._added = self._added, {}
+        if not added:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.cache_path.with_name(self.cache_path.name + '.lock')):
+            entries = {**self._read(), **added}
+            tmp = self.cache_path.with_name(f'{self.cache_path.name}.{os.getpid()}.part')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': VERSION, 'entries': entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)
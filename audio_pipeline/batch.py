@@ -0,0 +1,99 @@
+"""
+Batch synthesis: one TTS request per vocabulary row, split back into words.
+
+The words of a row are joined with a full stop so the provider leaves a clear
+pause between them. The combined clip is decoded to PCM, the pauses are found
+with vectorized frame-level silence detection, and each word is cut out and
+re-encoded as its own MP3. A row of ten words costs one request instead of ten.
+
+If the number of pauses found does not match the number of words (a word
+with an internal pause, a provider that runs words together) the row raises
+BatchSplitError and the engine falls back to fetching those words one by one.
+"""
+
+import numpy as np
+
+from . import pcm
+from .providers import Utterance
+
+SEPARATOR = '。'
+# Google Translate TTS truncates long requests; stay well below its limit
+MAX_BATCH_CHARS = 150
+
+SILENCE_DB = -35       # frames quieter than this (relative to the peak) are silence
+MIN_GAP_MS = 150       # shortest pause treated as a word boundary
+PAD_MS = 40            # silence kept on each side of a word
+FRAME_MS = 10
+
+
+class BatchSplitError(Exception):
+    """The combined clip could not be split into the expected number of words."""
+
+
+def batch_utterance(utterances: list) -> Utterance:
+    """Single utterance reading all texts with pauses in between."""
+    first = utterances[0]
+    text = SEPARATOR.join(u.text for u in utterances) + SEPARATOR
+    return Utterance(text, provider=first.provider, lang=first.lang, speed=first.speed)
+
+
+def chunk_utterances(utterances: list, max_chars: int = MAX_BATCH_CHARS) -> list:
+    """Split a row into batches that stay under the provider's text limit."""
+    batches, current, length = [], [], 0
+    for utterance in utterances:
+        size = len(utterance.text) + len(SEPARATOR)
+        if current and length + size > max_chars:
+            batches.append(current)
+            current, length = [], 0
+        current.append(utterance)
+        length += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def find_segments(samples: np.ndarray, count: int, sample_rate: int = pcm.SAMPLE_RATE) -> list:
+    """
+    (start, end) sample ranges of `count` words separated by pauses.
+
+    The `count - 1` longest interior silent runs are taken as the word
+    boundaries.
+    """
+    db = pcm.frame_db(samples, sample_rate, FRAME_MS)
+    frame = sample_rate * FRAME_MS // 1000
+    silent = db < SILENCE_DB
+    voiced = np.flatnonzero(~silent)
+    if len(voiced) == 0:
+        raise BatchSplitError('clip is silent')
+
+    # Run-length encode the silence mask: starts/ends of each silent run
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    interior = (starts > voiced[0]) & (ends <= voiced[-1])
+    starts, ends = starts[interior], ends[interior]
+    lengths = ends - starts
+    long_enough = lengths >= MIN_GAP_MS // FRAME_MS
+    starts, ends, lengths = starts[long_enough], ends[long_enough], lengths[long_enough]
+
+    if len(lengths) < count - 1:
+        raise BatchSplitError(f'found {len(lengths)} pauses, expected {count - 1}')
+
+    chosen = np.sort(np.argsort(lengths, kind='stable')[len(lengths) - (count - 1):])
+    word_starts = np.concatenate(([voiced[0]], ends[chosen]))
+    word_ends = np.concatenate((starts[chosen], [voiced[-1] + 1]))
+
+    pad = PAD_MS // FRAME_MS
+    segments = []
+    for start, end in zip(word_starts, word_ends):
+        start = max(0, start - pad) * frame
+        end = min(len(db), end + pad) * frame
+        if end - start < frame * MIN_GAP_MS // FRAME_MS:
+            raise BatchSplitError('segment too short to be a word')
+        segments.append((int(start), int(end)))
+    return segments
+
+
+def split_clip(data: bytes, count: int) -> list:
+    """Split a combined MP3 into `count` per-word MP3s."""
+    samples = pcm.decode(data)
+    return [pcm.encode(samples[start:end]) for start, end in find_segments(samples, count)]
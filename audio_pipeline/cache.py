@@ -0,0 +1,118 @@
+"""
+Content-addressed cache of synthesized clips.
+
+Every utterance is identified by (text, provider, lang, speed). The manifest
+maps that key to the SHA-256 of the audio bytes, and the bytes themselves are
+stored once under objects/<aa>/<sha256>.mp3. The same word requested by
+several datasets (public/audio, audio/, audio/radicals, public/audio/cc1 ...)
+is therefore fetched once and copied out of the cache afterwards.
+
+Several download scripts may run at once: objects are written atomically
+under per-process temporary names, and save() merges the manifest with the
+entries other processes saved since it was loaded.
+
+Layout:
+    .audio_cache/manifest.json
+    .audio_cache/objects/3f/3fa1...e9.mp3
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from .flight import file_lock
+from .paths import CACHE_DIR
+from .providers import Utterance
+
+
+def utterance_key(utterance: Utterance) -> str:
+    """Stable key for an utterance; speed is normalized so 1 and 1.0 match."""
+    ident = [utterance.text, utterance.provider, utterance.lang, float(utterance.speed)]
+    return hashlib.sha256(json.dumps(ident, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class AudioCache:
+    """Manifest-backed store of clip bytes, addressed by content hash."""
+
+    def __init__(self, root: Path = CACHE_DIR):
+        self.root = Path(root)
+        self.manifest_path = self.root / 'manifest.json'
+        self.entries = self._read()
+        self._added = {}
+
+    def _read(self) -> dict:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['entries']
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / 'objects' / digest[:2] / f'{digest}.mp3'
+
+    def lookup(self, utterance: Utterance) -> Optional[Path]:
+        """Path of the cached clip for this utterance, if we have one."""
+        entry = self.entries.get(utterance_key(utterance))
+        if entry is None:
+            return None
+        path = self.object_path(entry['sha256'])
+        return path if path.exists() else None
+
+    def get(self, utterance: Utterance) -> Optional[bytes]:
+        path = self.lookup(utterance)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def get_object(self, digest: str) -> Optional[bytes]:
+        """Stored bytes with this SHA-256, if present."""
+        try:
+            with open(self.object_path(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_object(self, data: bytes) -> str:
+        """Store bytes under their SHA-256 (no manifest entry) and return the digest."""
+        digest = sha256_bytes(data)
+        path = self.object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'.{path.name}.{os.getpid()}.part')
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return digest
+
+    def put(self, utterance: Utterance, data: bytes) -> Path:
+        """Store clip bytes for an utterance (deduplicated by content)."""
+        digest = self.put_object(data)
+        key = utterance_key(utterance)
+        self.entries[key] = self._added[key] = {
+            'text': utterance.text,
+            'provider': utterance.provider,
+            'lang': utterance.lang,
+            'speed': float(utterance.speed),
+            'sha256': digest,
+            'size': len(data),
+        }
+        return self.object_path(digest)
+
+    def save(self):
+        """Write the manifest if anything changed, keeping what other processes saved meanwhile."""
+        if not self._added:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.root / 'manifest.lock'):
+            self.entries = {**self._read(), **self._added}
+            tmp = self.manifest_path.with_name(f'manifest.json.{os.getpid()}.part')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.manifest_path)
+        self._added = {}
@@ -0,0 +1,94 @@
+"""
+Long-text synthesis: split paragraphs into sentences, fetch them in parallel.
+
+A paragraph sent as one request waits for the slowest, longest response,
+gets truncated or rejected once it passes the provider's text limit, and
+leaves no way to tell where each sentence starts. With chunk=True the engine
+splits a multi-sentence utterance at sentence punctuation (falling back to
+clause punctuation, then a hard cut, for sentences over MAX_CHUNK_CHARS),
+resolves every sentence as its own utterance - concurrently, and cached on
+its own so an edited paragraph only refetches the sentences that changed -
+and stitches the clips by concatenating their MP3 frames (sprites.pack with
+no gap), so nothing is re-encoded and there is no seam.
+
+timeline() recovers each sentence's [start_ms, end_ms] in the stitched clip
+from the cached sentence clips, for pages that seek by sentence.
+"""
+
+import re
+from typing import Optional
+
+from .mp3 import probe_bytes
+from .providers import Utterance
+
+# Google Translate TTS rejects requests past ~200 characters
+MAX_CHUNK_CHARS = 100
+
+SENTENCE = re.compile(r'[^。！？!?；;…]+(?:[。！？!?；;…]+[”’」』）)]*|$)')
+CLAUSE = re.compile(r'[^，、：,:]+(?:[，、：,:]+|$)')
+
+
+def _split(text: str, pattern: re.Pattern) -> list:
+    return [piece.strip() for piece in pattern.findall(text) if piece.strip()]
+
+
+def _fit(pieces: list, max_chars: int) -> list:
+    """Join neighbouring pieces while they fit in max_chars."""
+    joined = []
+    for piece in pieces:
+        if joined and len(joined[-1]) + len(piece) <= max_chars:
+            joined[-1] += piece
+        else:
+            joined.append(piece)
+    return joined
+
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list:
+    """
+    Sentences of `text`, each keeping its punctuation and none longer than
+    max_chars: long sentences are split at clause punctuation, and clauses
+    still too long are cut at max_chars.
+    """
+    chunks = []
+    for sentence in _split(text, SENTENCE):
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+        pieces = []
+        for clause in _split(sentence, CLAUSE):
+            pieces.extend(clause[i:i + max_chars] for i in range(0, len(clause), max_chars))
+        chunks.extend(_fit(pieces, max_chars))
+    return chunks
+
+
+def sentence_utterances(utterance: Utterance, max_chars: int = MAX_CHUNK_CHARS) -> list:
+    """One utterance per sentence, with the original's provider, language and speed."""
+    return [Utterance(text, provider=utterance.provider, lang=utterance.lang, speed=utterance.speed)
+            for text in split_sentences(utterance.text, max_chars)]
+
+
+def stitch(datas: list) -> tuple:
+    """(MP3 bytes, [(offset_ms, duration_ms)]) of the clips played back to back."""
+    from .sprites import pack
+
+    return pack(datas, gap_ms=0)
+
+
+def timeline(utterance: Utterance, cache, max_chars: int = MAX_CHUNK_CHARS,
+             expected_ms: Optional[int] = None) -> Optional[list]:
+    """
+    [{'text', 'start_ms', 'end_ms'}] for each sentence of a stitched
+    utterance, or None if a sentence clip is not cached or the offsets don't
+    add up to `expected_ms` (the clip on disk was not stitched from them).
+    """
+    chunks = sentence_utterances(utterance, max_chars)
+    datas = [cache.get(chunk) for chunk in chunks]
+    if any(data is None for data in datas):
+        return None
+    _, entries = stitch(datas) if len(datas) > 1 else (None, [(0, probe_bytes(datas[0]).duration_ms)])
+    end = entries[-1][0] + entries[-1][1]
+    # Allow a frame of rounding either way
+    if expected_ms is not None and abs(end - expected_ms) > 30:
+        return None
+    return [{'text': chunk.text, 'start_ms': offset, 'end_ms': offset + duration}
+            for chunk, (offset, duration) in zip(chunks, entries)]
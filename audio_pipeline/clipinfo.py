@@ -0,0 +1,206 @@
+"""
+Precomputed per-clip duration, peak and leading silence.
+
+build_clip_index() measures every clip once, on a process pool: duration
+from the MP3 frame chain (mp3.py, no decoding), peak amplitude and the
+offset of the first voiced frame from the decoded PCM. Measurements are
+cached by content hash in .audio_cache/clipinfo.json, so a rebuild only
+decodes new or changed clips.
+
+The served clips are published as public/data/audio_index.json:
+
+    {"version": 1, "fields": ["duration_ms", "peak", "lead_ms"],
+     "clips": {"audio/外面.mp3": [1128, 0.912, 48], ...}}
+
+keyed by the same paths the data files use, so the site knows how long a
+clip is before loading it, and the video generator and sprite packer need
+no ffprobe or decoding at all. The local cache also keeps the size and
+mtime each clip had when it was measured; clip_info() measures a clip
+again when it no longer matches (normalized or refetched since), rather
+than hand out stale offsets.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from . import pcm
+from .cache import sha256_bytes
+from .engine import write_atomic
+from .mp3 import probe_bytes
+from .normalize import voiced_span
+from .paths import CACHE_DIR, ROOT, list_clips
+
+PUBLIC_DIR = ROOT / 'public'
+INDEX_PATH = PUBLIC_DIR / 'data' / 'audio_index.json'
+CACHE_PATH = CACHE_DIR / 'clipinfo.json'
+FIELDS = ('duration_ms', 'peak', 'lead_ms')
+
+
+@dataclass(frozen=True)
+class ClipInfo:
+    duration_ms: int
+    peak: Optional[float] = None       # 0..1, None if the clip could not be decoded
+    lead_ms: Optional[int] = None      # silence before the first voiced frame
+
+    def as_list(self) -> list:
+        return [self.duration_ms, self.peak, self.lead_ms]
+
+
+def measure(data: bytes) -> ClipInfo:
+    """Duration from the frame chain; peak and leading silence from the PCM if ffmpeg can decode it."""
+    info = probe_bytes(data)
+    if not info.valid:
+        raise ValueError(info.error)
+    try:
+        samples = pcm.decode(data)
+    except (pcm.DecodeError, OSError):
+        # No ffmpeg, or a frame chain ffmpeg still can't decode
+        return ClipInfo(info.duration_ms)
+    if len(samples) == 0:
+        return ClipInfo(info.duration_ms, 0.0, 0)
+    lead = voiced_span(samples, pad_ms=0)[0] * 1000 // pcm.SAMPLE_RATE
+    return ClipInfo(info.duration_ms, round(float(np.abs(samples).max()), 3), int(lead))
+
+
+def _measure_path(path: str) -> tuple:
+    """Worker: (path, sha256, ClipInfo or None, error)."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        return path, sha256_bytes(data), measure(data), ''
+    except (OSError, ValueError) as e:
+        return path, '', None, str(e)
+
+
+def clip_key(path) -> str:
+    """'audio/x.mp3' for served clips (as in the data files), else the repo-relative path."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(PUBLIC_DIR).as_posix()
+    except ValueError:
+        return path.relative_to(ROOT).as_posix()
+
+
+def _load_cache() -> tuple:
+    """(sha256 -> measurement, clip key -> [size, mtime_ns] when measured)."""
+    if not CACHE_PATH.exists():
+        return {}, {}
+    with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+        cached = json.load(f)
+    return cached['entries'], cached.get('files', {})
+
+
+def _stat(path) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def build_clip_index(directories, workers: int = None, index=None, on_error=None) -> dict:
+    """
+    Measure every clip under `directories` (reusing cached measurements by
+    hash) and write public/data/audio_index.json for the served ones.
+    Returns counts of 'measured', 'cached' and 'failed'.
+    """
+    cache, files = _load_cache()
+    stats = {'measured': 0, 'cached': 0, 'failed': 0}
+    infos = {}
+    todo = []
+    for path in list_clips(directories):
+        digest = index.digest(path) if index is not None else None
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = sha256_bytes(f.read())
+        if digest in cache:
+            infos[path] = ClipInfo(*cache[digest])
+            stats['cached'] += 1
+        else:
+            todo.append(path)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, digest, info, error in pool.map(_measure_path, todo, chunksize=32):
+                if info is None:
+                    stats['failed'] += 1
+                    if on_error:
+                        on_error(path, error)
+                    continue
+                infos[path] = info
+                if info.peak is not None:
+                    # Duration-only results are redone once ffmpeg is available
+                    cache[digest] = info.as_list()
+                stats['measured'] += 1
+
+    for path in infos:
+        files[clip_key(path)] = _stat(path)
+    files = {key: value for key, value in files.items()
+             if (PUBLIC_DIR / key).exists() or (ROOT / key).exists()}
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(CACHE_PATH, json.dumps({'version': 1, 'entries': cache, 'files': files},
+                                        ensure_ascii=False).encode('utf-8'))
+
+    published = {}
+    if INDEX_PATH.exists():
+        with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+            published = json.load(f)['clips']
+    for path, info in infos.items():
+        if Path(path).resolve().is_relative_to(PUBLIC_DIR):
+            published[clip_key(path)] = info.as_list()
+    published = {key: value for key, value in published.items() if (PUBLIC_DIR / key).exists()}
+    write_atomic(INDEX_PATH, json.dumps(
+        {'version': 1, 'fields': list(FIELDS), 'clips': dict(sorted(published.items()))},
+        ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return stats
+
+
+_loaded = None
+_measured_files = None
+_remeasured = {}
+
+
+def load_clip_index() -> dict:
+    """clip key -> ClipInfo from the published index (empty if it hasn't been built)."""
+    global _loaded
+    if _loaded is None:
+        _loaded = {}
+        if INDEX_PATH.exists():
+            with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+                _loaded = {key: ClipInfo(*value) for key, value in json.load(f)['clips'].items()}
+    return _loaded
+
+
+def clip_info(path) -> Optional[ClipInfo]:
+    """
+    Indexed info for a clip file, or None if the index doesn't cover it.
+    A clip whose size or mtime changed since it was indexed is measured
+    again (once per process).
+    """
+    global _measured_files
+    try:
+        key = clip_key(path)
+    except ValueError:
+        return None
+    info = load_clip_index().get(key)
+    if info is None:
+        return None
+    if _measured_files is None:
+        _measured_files = _load_cache()[1]
+    measured = _measured_files.get(key)
+    try:
+        current = _stat(path)
+    except FileNotFoundError:
+        return None
+    if measured is None or measured == current:
+        return info
+    if (key, *current) not in _remeasured:
+        try:
+            with open(path, 'rb') as f:
+                _remeasured[(key, *current)] = measure(f.read())
+        except (OSError, ValueError):
+            _remeasured[(key, *current)] = None
+    return _remeasured[(key, *current)]
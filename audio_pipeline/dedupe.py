@@ -0,0 +1,235 @@
+"""
+Find duplicate clips across the audio directories and point data at one copy.
+
+The same utterance often exists several times: public/audio/<word>.mp3,
+public/audio/cc1/word_<word>.mp3, public/audio/p3hcl-wupin/<word>.mp3 and
+their mirrors under audio/. Clips are grouped in two passes:
+
+- identical: same SHA-256 (taken from the audio index where current)
+- similar: same word (file name without a `word_` prefix) but different
+  bytes, confirmed by a decoded-PCM fingerprint - one bit per adjacent band
+  pair per 32 ms frame, set when the band's energy rises faster than its
+  neighbour's. Two renderings of the same utterance with different MP3
+  encoders or ID3 tags agree on almost every bit; a different voice or speed
+  does not.
+
+Each group gets a canonical copy under public/ (the site only serves
+public/), and the `audio` fields of the data JSON files are rewritten to
+point at it, so one object is deployed and uploaded instead of several.
+"""
+
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+import numpy as np
+
+from . import pcm
+from .cache import sha256_bytes
+from .engine import write_atomic
+from .paths import ROOT, list_clips
+
+PUBLIC_DIR = ROOT / 'public'
+DATA_DIR = PUBLIC_DIR / 'data'
+
+FINGERPRINT_RATE = 8000
+FINGERPRINT_FRAME = 256          # 32 ms at 8 kHz
+FINGERPRINT_BANDS = 17           # 16 bits per frame
+# Fraction of fingerprint bits that may differ for two clips to count as the same
+MAX_BIT_ERROR = 0.2
+# Durations must agree this closely before fingerprints are compared
+MAX_LENGTH_RATIO = 1.1
+
+# Clips whose paths are built in code (src/routes) rather than read from data
+# files; they are never removed even when another copy is canonical
+CODE_REFERENCED = (
+    'public/audio/*.mp3',
+    'public/audio/cc1/*.mp3',
+)
+
+AUDIO_FIELD = re.compile(r'("audio"\s*:\s*")([^"]+\.mp3)(")')
+
+
+@dataclass
+class DuplicateGroup:
+    kind: str                                  # 'identical' or 'similar'
+    canonical: str                             # repo-relative path
+    copies: list = field(default_factory=list)  # repo-relative paths, canonical excluded
+
+    def wasted_bytes(self) -> int:
+        return sum(os.path.getsize(ROOT / path) for path in self.copies)
+
+
+def relative(path) -> str:
+    return Path(path).resolve().relative_to(ROOT).as_posix()
+
+
+def is_code_referenced(path: str) -> bool:
+    return any(PurePosixPath(path).match(pattern) for pattern in CODE_REFERENCED)
+
+
+def word_of(path: str) -> str:
+    """The word a clip speaks, judging by its file name."""
+    name = Path(path).stem
+    return name[len('word_'):] if name.startswith('word_') else name
+
+
+def canonical_rank(path: str) -> tuple:
+    """Sort key: served copies first, code-referenced ones before others, then shortest path."""
+    return (
+        not path.startswith('public/'),
+        not is_code_referenced(path),
+        path.count('/'),
+        len(path),
+        path,
+    )
+
+
+def fingerprint(samples: np.ndarray) -> np.ndarray:
+    """Boolean (frames, bands - 1) matrix of band-energy slope bits for 8 kHz samples."""
+    count = len(samples) // FINGERPRINT_FRAME
+    if count < 2:
+        return np.zeros((0, FINGERPRINT_BANDS - 1), dtype=bool)
+    frames = samples[:count * FINGERPRINT_FRAME].reshape(count, FINGERPRINT_FRAME)
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FINGERPRINT_FRAME), axis=1)) ** 2
+    # Log-spaced bands between 300 Hz and 3.4 kHz (telephone speech range)
+    edges = np.geomspace(300, 3400, FINGERPRINT_BANDS + 1) * FINGERPRINT_FRAME / FINGERPRINT_RATE
+    edges = edges.astype(int)
+    bands = np.add.reduceat(spectrum, edges[:-1], axis=1)[:, :FINGERPRINT_BANDS]
+    energy = np.log(bands + 1e-10)
+    delta = np.diff(energy, axis=0)                       # change over time
+    return (delta[:, :-1] - delta[:, 1:]) > 0             # compared across neighbouring bands
+
+
+def bit_error(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of differing bits over the overlap; 1.0 if lengths are too far apart."""
+    if len(a) == 0 or len(b) == 0 or max(len(a), len(b)) > MAX_LENGTH_RATIO * min(len(a), len(b)):
+        return 1.0
+    n = min(len(a), len(b))
+    return float(np.mean(a[:n] != b[:n]))
+
+
+def _fingerprint_path(path: str) -> tuple:
+    try:
+        return path, fingerprint(pcm.decode(ROOT / path, FINGERPRINT_RATE))
+    except pcm.DecodeError:
+        return path, None
+
+
+def _hash_clips(paths: list, index=None) -> dict:
+    """relative path -> sha256."""
+    hashes = {}
+    for path in paths:
+        digest = index.digest(path) if index is not None else None
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = sha256_bytes(f.read())
+        hashes[relative(path)] = digest
+    return hashes
+
+
+def find_duplicates(directories, index=None, similar: bool = True, workers: int = None) -> list:
+    """Identical and (optionally) similar clip groups under `directories`."""
+    hashes = _hash_clips(list_clips(directories), index)
+
+    by_hash = defaultdict(list)
+    for path, digest in hashes.items():
+        by_hash[digest].append(path)
+    groups = []
+    representative = {}         # one path per distinct content
+    for paths in by_hash.values():
+        paths.sort(key=canonical_rank)
+        representative[paths[0]] = paths
+        if len(paths) > 1:
+            groups.append(DuplicateGroup('identical', paths[0], paths[1:]))
+
+    if not similar:
+        return groups
+
+    by_word = defaultdict(list)
+    for path in representative:
+        by_word[word_of(path)].append(path)
+    candidates = [paths for paths in by_word.values() if len(paths) > 1]
+    if not candidates:
+        return groups
+
+    to_fingerprint = sorted({path for paths in candidates for path in paths})
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        prints = dict(pool.map(_fingerprint_path, to_fingerprint, chunksize=16))
+
+    for paths in candidates:
+        paths = sorted((p for p in paths if prints.get(p) is not None), key=canonical_rank)
+        while paths:
+            head, rest = paths[0], paths[1:]
+            matched = [p for p in rest if bit_error(prints[head], prints[p]) <= MAX_BIT_ERROR]
+            if matched:
+                # Everything byte-identical to a matched clip goes along with it
+                copies = [c for p in matched for c in representative[p]]
+                groups.append(DuplicateGroup('similar', head, copies))
+            paths = [p for p in rest if p not in matched]
+    return groups
+
+
+def canonical_map(groups: list) -> dict:
+    """Public URL path ('audio/x.mp3') of every served copy -> that of its canonical copy."""
+    mapping = {}
+    for group in groups:
+        if not group.canonical.startswith('public/'):
+            continue
+        target = group.canonical[len('public/'):]
+        for copy in group.copies:
+            if copy.startswith('public/'):
+                mapping[copy[len('public/'):]] = target
+    return mapping
+
+
+def rewrite_data(mapping: dict, data_files=None, dry_run: bool = False) -> dict:
+    """
+    Point `audio` fields at canonical copies. Edits the JSON text in place so
+    formatting and key order are untouched. Returns {file: fields changed}.
+    """
+    changed = {}
+    for path in data_files or sorted(DATA_DIR.rglob('*.json')):
+        text = Path(path).read_text(encoding='utf-8')
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            value = match.group(2)
+            target = mapping.get(value.lstrip('/'))
+            if target is None:
+                return match.group(0)
+            count += 1
+            prefix = '/' if value.startswith('/') else ''
+            return f'{match.group(1)}{prefix}{target}{match.group(3)}'
+
+        new_text = AUDIO_FIELD.sub(replace, text)
+        if count:
+            changed[relative(path)] = count
+            if not dry_run:
+                write_atomic(Path(path), new_text.encode('utf-8'))
+    return changed
+
+
+def referenced_clips(data_files=None) -> set:
+    """Repo-relative paths of every clip an `audio` field points at."""
+    found = set()
+    for path in data_files or sorted(DATA_DIR.rglob('*.json')):
+        for match in AUDIO_FIELD.finditer(Path(path).read_text(encoding='utf-8')):
+            found.add('public/' + match.group(2).lstrip('/'))
+    return found
+
+
+def removable_copies(groups: list, referenced: set) -> list:
+    """Served non-canonical copies that no data file or code path still uses."""
+    removable = []
+    for group in groups:
+        if not group.canonical.startswith('public/'):
+            continue
+        for copy in group.copies:
+            if copy.startswith('public/') and copy not in referenced and not is_code_referenced(copy):
+                removable.append(copy)
+    return removable
@@ -0,0 +1,182 @@
+"""
+Dictation tracks: one paced MP3 per vocabulary row.
+
+A tingxie dictation reads each word, pauses, reads it again and then leaves
+time to write it down before the next word. Rather than leave that pacing to
+the page, a dictation track renders it: each row's clips are decoded to PCM,
+trimmed to their voiced span, laid out with the pauses in Pacing and encoded
+once. The track index lists, per word, when each reading starts and ends and
+when the writing time is over (`reveal_ms`), so the page can reveal the word
+on screen as the next one begins.
+
+Rows are rendered on a process pool. A track is rebuilt only when its clips,
+their files or the pacing changed. A clip that can't be decoded is left out
+of its track and reported missing; a track that fails to render keeps its
+previous version, marked stale so the next run tries again.
+
+Layout:
+    public/audio-dictation/tingxie/row-1.mp3
+    public/audio-dictation/tingxie.json    {"pacing": {...}, "tracks": {"row-1": {"url": ..., "cues": [...]}}}
+"""
+
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from . import pcm
+from .engine import write_atomic
+from .normalize import voiced_span
+from .sprites import PUBLIC_DIR, clip_file
+
+DICTATION_DIR = PUBLIC_DIR / 'audio-dictation'
+
+
+@dataclass(frozen=True)
+class Pacing:
+    """How a row is read out."""
+    repeats: int = 2
+    repeat_gap_ms: int = 2000     # between two readings of a word
+    word_gap_ms: int = 4000       # writing time after the last reading ...
+    per_char_ms: int = 1000       # ... plus this much per character
+    lead_ms: int = 1000           # silence before the first word
+
+    def writing_ms(self, text: str) -> int:
+        return self.word_gap_ms + self.per_char_ms * len(re.sub(r'\W', '', text))
+
+
+@dataclass
+class Track:
+    """A row's words in reading order, as (text, audio path) pairs."""
+    name: str
+    words: list
+    missing: list = field(default_factory=list)
+
+
+def render(datas: list, texts: list, pacing: Pacing) -> tuple:
+    """(mp3 bytes, cues) for the clips of one row, read out with the given pacing."""
+    return _layout([pcm.decode(data) for data in datas], texts, pacing)
+
+
+def _layout(clips: list, texts: list, pacing: Pacing) -> tuple:
+    """render() for clips already decoded to samples."""
+    def ms(samples: int) -> int:
+        return samples * 1000 // pcm.SAMPLE_RATE
+
+    def silence(duration_ms: int) -> np.ndarray:
+        return np.zeros(pcm.SAMPLE_RATE * duration_ms // 1000, dtype=np.float32)
+
+    parts, cues = [silence(pacing.lead_ms)], []
+    position = len(parts[0])
+    for samples, text in zip(clips, texts):
+        start, end = voiced_span(samples)
+        speech = samples[start:end]
+        readings = []
+        for i in range(pacing.repeats):
+            if i:
+                parts.append(silence(pacing.repeat_gap_ms))
+                position += len(parts[-1])
+            readings.append([ms(position), ms(position + len(speech))])
+            parts.append(speech)
+            position += len(speech)
+        parts.append(silence(pacing.writing_ms(text)))
+        position += len(parts[-1])
+        cues.append({'text': text, 'readings': readings, 'reveal_ms': ms(position)})
+    return pcm.encode(np.concatenate(parts)), cues
+
+
+def _render_paths(job: tuple) -> tuple:
+    """
+    Worker: (name, mp3 bytes or None, cues, indices of the clips left out,
+    error) for one track. Clips that can't be read or decoded are left out.
+    """
+    name, paths, texts, pacing = job
+    clips, kept, skipped = [], [], []
+    for i, path in enumerate(paths):
+        try:
+            clips.append(pcm.decode(path))
+            kept.append(texts[i])
+        except (OSError, pcm.DecodeError):
+            skipped.append(i)
+    if not clips:
+        return name, None, [], skipped, 'no clip could be decoded'
+    try:
+        data, cues = _layout(clips, kept, pacing)
+        return name, data, cues, skipped, ''
+    except pcm.DecodeError as e:
+        return name, None, [], skipped, str(e)[:120]
+
+
+def build_tracks(dataset: str, tracks: list, pacing: Pacing = Pacing(), workers: int = None,
+                 force: bool = False, on_track=None) -> dict:
+    """
+    Render each Track into public/audio-dictation/<dataset>/<name>.mp3 and
+    write the dataset's cue index. Returns counts of 'built', 'current',
+    'failed' and 'missing' clips.
+    """
+    out_dir = DICTATION_DIR / dataset
+    index_path = DICTATION_DIR / f'{dataset}.json'
+    old, old_pacing = {}, None
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        old, old_pacing = previous['tracks'], previous['pacing']
+
+    stats = {'built': 0, 'current': 0, 'failed': 0, 'missing': 0}
+    index, todo = {}, {}
+    for track in tracks:
+        present = [(text, audio) for text, audio in track.words if clip_file(audio).exists()]
+        track.missing = [audio for _, audio in track.words if not clip_file(audio).exists()]
+        stats['missing'] += len(track.missing)
+        if not present:
+            continue
+
+        path = out_dir / f'{track.name}.mp3'
+        entry = old.get(track.name)
+        if (not force and entry is not None and not entry.get('stale')
+                and old_pacing == asdict(pacing) and path.exists()
+                and [(cue['text'], cue['audio']) for cue in entry['cues']] == present
+                and all(clip_file(a).stat().st_mtime_ns <= path.stat().st_mtime_ns for _, a in present)):
+            index[track.name] = entry
+            stats['current'] += 1
+            continue
+        todo[track.name] = (track, present)
+
+    if todo:
+        jobs = [(name, [str(clip_file(a)) for _, a in present], [t for t, _ in present], pacing)
+                for name, (_, present) in todo.items()]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for name, data, cues, skipped, error in pool.map(_render_paths, jobs):
+                track, present = todo[name]
+                track.missing += [present[i][1] for i in skipped]
+                stats['missing'] += len(skipped)
+                present = [word for i, word in enumerate(present) if i not in skipped]
+                path = out_dir / f'{name}.mp3'
+                if data is None:
+                    stats['failed'] += 1
+                    if name in old and path.exists():
+                        # Better the previous version than no track at all
+                        index[name] = {**old[name], 'stale': True}
+                    if on_track:
+                        on_track(track, error)
+                    continue
+                write_atomic(path, data)
+                index[name] = {
+                    'url': '/' + path.relative_to(PUBLIC_DIR).as_posix(),
+                    'duration_ms': cues[-1]['reveal_ms'],
+                    'cues': [{'audio': audio, **cue} for cue, (_, audio) in zip(cues, present)],
+                }
+                stats['built'] += 1
+                if on_track:
+                    on_track(track, '')
+
+    names = [track.name for track in tracks if track.name in index]
+    for stale in out_dir.glob('*.mp3') if out_dir.exists() else ():
+        if stale.stem not in index:
+            stale.unlink()
+    write_atomic(index_path, json.dumps({'version': 1, 'pacing': asdict(pacing),
+                                         'tracks': {name: index[name] for name in names}},
+                                        ensure_ascii=False, indent=1).encode('utf-8'))
+    return stats
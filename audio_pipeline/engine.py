@@ -0,0 +1,599 @@
+"""
+Asyncio fetch engine shared by every audio download script.
+
+Scripts describe *what* they need as a list of FetchJob (text + destination)
+and hand it to run_jobs(). The engine takes care of skipping clips the
+AudioIndex already knows are on disk, resolving clips from the shared AudioCache, bounded concurrency, per-host
+rate limiting that adapts to throttling (see limiter.py) and retries, so a full rebuild runs as fast as the providers
+allow instead of sleeping between every word. With batch=True, jobs sharing a
+`group` (a vocabulary row) are fetched as one utterance and split back into
+words (see batch.py). With a `journal` name, every job's state is logged to
+a write-ahead journal so an interrupted run resumes where it stopped. With
+stretch=True, slowed-down utterances are derived locally from the
+normal-speed clip instead of being requested again (see stretch.py). With
+chunk=True, multi-sentence texts are fetched one sentence at a time, in
+parallel, and stitched back together (see chunker.py). With slicer=True,
+words already spoken in a sentence or passage recording are cut out of it
+instead of being fetched (see align.py). Every run writes
+request timings, sizes, errors and retries to .audio_cache/metrics/ (see
+metrics.py).
+
+Usage:
+    from audio_pipeline import FetchJob, Utterance, run_jobs, print_summary
+
+    jobs = [FetchJob(Utterance(word, speed=0.5), f"audio/{word}.mp3") for word in words]
+    print_summary(run_jobs(jobs))
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlencode, urlsplit
+
+from .cache import AudioCache, utterance_key
+from .flight import Flights
+from .http import TRANSPORT_ERRORS, Response, open_client
+from .index import AudioIndex
+from .journal import (
+    DONE, FAILED, IN_FLIGHT, PENDING,
+    CircuitBreaker, CircuitOpenError, JobJournal, backoff_delay,
+)
+from .limiter import AdaptiveLimiter, RateStore, MAX_RATE_FACTOR, TokenBucket
+from .metrics import Metrics
+from .providers import (
+    MIN_AUDIO_BYTES, THROTTLE_STATUSES, ProviderError, ThrottledError, Utterance, get_provider,
+)
+
+# Requests per second allowed for each host (burst of the same size)
+DEFAULT_HOST_RATES = {
+    'translate.google.com': 5.0,
+    'ttsmp3.com': 2.0,
+}
+DEFAULT_RATE = 4.0
+DEFAULT_CONCURRENCY = 8
+
+# Host of the request the current task made last, so a provider's verdict
+# on a response (HTML, undersized) can be charged to the right limiter
+_last_host = contextvars.ContextVar('last_host', default='')
+
+
+@dataclass(frozen=True)
+class FetchJob:
+    """
+    One clip to produce: what to say and where to write it.
+
+    Jobs with the same `group` (e.g. a vocabulary row) may be synthesized
+    together in batch mode.
+    """
+    utterance: Utterance
+    dest: Path
+    label: str = ''
+    group: str = ''
+
+    def __post_init__(self):
+        object.__setattr__(self, 'dest', Path(self.dest))
+        if not self.label:
+            object.__setattr__(self, 'label', self.utterance.text)
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a FetchJob: 'downloaded', 'batched', 'stretched', 'stitched',
+    'sliced', 'cached', 'skipped' or 'failed'.
+    """
+    job: FetchJob
+    status: str
+    size: int = 0
+    attempts: int = 0
+    error: str = ''
+
+
+def is_valid_file(path: Path, min_bytes: int = MIN_AUDIO_BYTES) -> bool:
+    """Cheap existence check used to skip clips that are already on disk."""
+    try:
+        return path.stat().st_size >= min_bytes
+    except OSError:
+        return False
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write to a temporary sibling and rename, so readers never see half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.part')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class FetchEngine:
+    """
+    Runs FetchJobs concurrently with per-host token-bucket rate limits.
+    `host_rates` are the starting rates; with `rates` (a RateStore, True
+    for .audio_cache/rates.json) each host's rate and in-flight window then
+    follow AIMD and the learned values carry over to the next run. Pass
+    rates=False for fixed rates. With `flights` (and a cache), engines in
+    other processes asking for the same utterance wait for this one's
+    request rather than repeating it (see flight.py). `provider` (default:
+    the TTS_PROVIDER environment variable) sends every job to that provider
+    instead of its own, e.g. 'fake' to run a whole script offline.
+
+    All providers share one pooled keep-alive HTTP client (see http.py),
+    opened on first use and closed when run() finishes.
+    `cache` is the AudioCache consulted before any network request; pass
+    False to always hit the provider. `index` is the AudioIndex used to
+    decide which destinations already hold a valid clip; pass False to fall
+    back to stat()ing each destination. `batch` enables one request per
+    job group, split into words by silence detection. `journal` names a
+    JobJournal (or is one) recording job states for crash-safe resumption.
+    `stretch` derives utterances with speed != 1.0 from the normal-speed
+    clip by local time-stretching, falling back to the provider if the clip
+    can't be decoded. `chunk` splits utterances of several sentences into
+    one concurrent request per sentence and stitches the clips. `slicer`
+    is the align.Slicer (True for one over the default recordings) that
+    word utterances are cut from before any request is made. `metrics`
+    is the Metrics collecting request timings (pass False to disable); it
+    is written at the end of run() under the journal's name, or the
+    script's.
+
+    Failed attempts are retried with jittered exponential backoff, and each
+    provider has a CircuitBreaker that pauses requests once it starts
+    returning throttle pages.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, host_rates: Optional[dict] = None,
+                 retries: int = 2, timeout: float = 15, overwrite: bool = False,
+                 cache=True, index=True, batch: bool = False, journal=None, stretch: bool = False,
+                 chunk: bool = False, slicer=False, metrics=True, rates=True,
+                 flights=True, provider: Optional[str] = None,
+                 on_result: Optional[Callable[[FetchResult, int, int], None]] = None):
+        self.concurrency = concurrency
+        self.host_rates = {**DEFAULT_HOST_RATES, **(host_rates or {})}
+        self.retries = retries
+        self.timeout = timeout
+        self.overwrite = overwrite
+        self.cache = AudioCache() if cache is True else (cache or None)
+        self.index = AudioIndex() if index is True else (index or None)
+        self.batch = batch
+        self.stretch = stretch
+        self.chunk = chunk
+        if slicer is True:
+            from .align import Slicer
+            slicer = Slicer()
+        self.slicer = slicer or None
+        self.journal = JobJournal(journal) if isinstance(journal, str) else journal
+        self.metrics = Metrics() if metrics is True else (metrics or None)
+        self.rates = RateStore() if rates is True else (rates or None)
+        self.flights = Flights() if flights is True else (flights or None)
+        self.provider = provider or os.environ.get('TTS_PROVIDER') or None
+        if self.provider is not None:
+            get_provider(self.provider)
+        self.on_result = on_result if on_result is not None else print_progress
+        self.http = None
+        self._buckets = {}
+        self._breakers = {}
+        self._inflight = {}
+        self._batched = {}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            rate = self.host_rates.get(host, DEFAULT_RATE)
+            if self.rates is None:
+                self._buckets[host] = TokenBucket(rate)
+            else:
+                learned = self.rates.get(host) or {}
+                self._buckets[host] = AdaptiveLimiter(
+                    learned.get('rate', rate), min(self.concurrency, learned.get('window', self.concurrency)),
+                    max_rate=rate * MAX_RATE_FACTOR, max_window=self.concurrency)
+        return self._buckets[host]
+
+    def throttled(self):
+        """A provider judged the last response of this task a throttle: slow its host down."""
+        bucket = self._buckets.get(_last_host.get())
+        if isinstance(bucket, AdaptiveLimiter):
+            bucket.throttled()
+
+    async def request(self, method: str, url: str, data=None, headers: Optional[dict] = None) -> Response:
+        """Rate-limited HTTP request; used by providers."""
+        headers = dict(headers or {})
+        if isinstance(data, dict):
+            data = urlencode(data).encode()
+            headers.setdefault('Content-Type', 'application/x-www-form-urlencoded; charset=UTF-8')
+        if self.http is None:
+            self.http = open_client(self.concurrency, self.timeout)
+        host = urlsplit(url).hostname or ''
+        _last_host.set(host)
+        bucket = self._bucket(host)
+        adaptive = isinstance(bucket, AdaptiveLimiter)
+        start = time.perf_counter()
+        await bucket.acquire()
+        sent = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, data, headers)
+        except TRANSPORT_ERRORS as e:
+            if self.metrics is not None:
+                self.metrics.inc('tts_request_errors_total', host=host, error=type(e).__name__)
+            raise
+        finally:
+            if adaptive:
+                await bucket.release()
+        if adaptive:
+            if response.status in THROTTLE_STATUSES:
+                bucket.throttled()
+            elif response.status == 200 and response.body.lstrip()[:1] != b'<':
+                bucket.success()
+        if self.metrics is not None:
+            self.metrics.record_request(host, sent - start, time.perf_counter() - sent, response)
+        return response
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> Response:
+        return await self.request('GET', url, headers=headers)
+
+    async def post(self, url: str, data=None, headers: Optional[dict] = None) -> Response:
+        return await self.request('POST', url, data=data, headers=headers)
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(provider)
+        return self._breakers[provider]
+
+    async def synthesize(self, utterance: Utterance) -> bytes:
+        """Fetch the audio for one utterance from its provider."""
+        breaker = self.breaker(utterance.provider)
+        await breaker.wait()
+        sent = time.monotonic()
+        try:
+            data = await get_provider(utterance.provider).synthesize(self, utterance)
+        except ThrottledError:
+            breaker.failure(sent)
+            self.throttled()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.success()
+        return data
+
+    def stretch_base(self, utterance: Utterance) -> Optional[Utterance]:
+        """The normal-speed utterance to stretch this one from, if stretching applies."""
+        if self.stretch and utterance.speed != 1.0:
+            return replace(utterance, speed=1.0)
+        return None
+
+    def sentence_chunks(self, utterance: Utterance) -> Optional[list]:
+        """Per-sentence utterances to stitch this one from, if chunking applies."""
+        if not self.chunk:
+            return None
+        from .chunker import sentence_utterances
+
+        chunks = sentence_utterances(utterance)
+        return chunks if len(chunks) > 1 else None
+
+    async def _slice(self, utterance: Utterance) -> Optional[bytes]:
+        """
+        The utterance cut from a recording that contains it, if there is one.
+        Cut clips are cached under provider 'sliced-v<align.VERSION>', never
+        under the TTS provider's key, so a run without the slicer still gets
+        the TTS voice and clips cut by an older aligner are not reused.
+        """
+        from .align import VERSION
+        from .pcm import DecodeError
+
+        if self.slicer is None or not self.slicer.covers(utterance):
+            return None
+        sliced = replace(utterance, provider=f'sliced-v{VERSION}')
+        if self.cache is not None:
+            data = self.cache.get(sliced)
+            if data is not None:
+                return data
+        try:
+            data = await asyncio.to_thread(self.slicer.cut, utterance)
+        except (DecodeError, OSError) as e:
+            print(f"  Could not cut '{utterance.text}' from a recording ({str(e)[:60]}); fetching it")
+            return None
+        if data is not None and self.cache is not None:
+            self.cache.put(sliced, data)
+        return data
+
+    async def _produce(self, utterance: Utterance) -> tuple:
+        """(data, source) from the network, by slicing a recording, stretching the normal-speed clip or stitching sentences."""
+        data = await self._slice(utterance)
+        if data is not None:
+            return data, 'sliced'
+        base = self.stretch_base(utterance)
+        if base is not None:
+            from .pcm import DecodeError
+            from .stretch import stretch_clip
+
+            data, _ = await self.resolve(base)
+            try:
+                return await asyncio.to_thread(stretch_clip, data, utterance.speed), 'stretched'
+            except DecodeError as e:
+                print(f"  Could not stretch '{utterance.text}' ({str(e)[:60]}); fetching it at speed {utterance.speed:g}")
+        chunks = self.sentence_chunks(utterance)
+        if chunks is not None:
+            from .chunker import stitch
+            from .pcm import DecodeError
+
+            parts = await asyncio.gather(*(self.resolve(chunk) for chunk in chunks))
+            try:
+                data, _ = await asyncio.to_thread(stitch, [data for data, _ in parts])
+                return data, 'stitched'
+            except (ValueError, DecodeError) as e:
+                print(f"  Could not stitch '{utterance.text[:20]}' ({str(e)[:60]}); fetching it in one piece")
+        return await self.synthesize(utterance), 'network'
+
+    async def resolve(self, utterance: Utterance) -> tuple:
+        """
+        Audio for an utterance as (data, source), source being 'network',
+        'batch', 'sliced', 'stretched', 'stitched' or 'cache'.
+
+        Concurrent jobs asking for the same utterance share one request,
+        also across processes.
+        """
+        key = utterance_key(utterance)
+        if key in self._batched:
+            return self._batched[key], 'batch'
+
+        if self.cache is not None:
+            data = self.cache.get(utterance)
+            if data is not None:
+                return data, 'cache'
+
+        task = self._inflight.get(key)
+        if task is not None:
+            data, _ = await task
+            return data, 'cache'
+
+        task = asyncio.ensure_future(self._flight(utterance, key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        data, source = await task
+        if self.cache is not None and source != 'sliced':
+            self.cache.put(utterance, data)
+        return data, source
+
+    async def _flight(self, utterance: Utterance, key: str) -> tuple:
+        """_produce() under the cross-process flight for the utterance, taking its result if one landed."""
+        if self.flights is None or self.cache is None:
+            return await self._produce(utterance)
+        waits = self.flights.waits
+        async with self.flights.hold(key):
+            if self.metrics is not None and self.flights.waits > waits:
+                self.metrics.inc('tts_flight_waits_total', provider=utterance.provider)
+            digest = self.flights.result(key)
+            data = self.cache.get_object(digest) if digest else None
+            if data is not None:
+                return data, 'cache'
+            data, source = await self._produce(utterance)
+            if source != 'sliced':
+                self.flights.publish(key, self.cache.put_object(data))
+            return data, source
+
+    async def _prefetch_batches(self, jobs: list, semaphore: asyncio.Semaphore):
+        """Fetch each job group in as few requests as possible and split it into words."""
+        from .batch import BatchSplitError, batch_utterance, chunk_utterances, split_clip
+        from .pcm import DecodeError
+
+        groups, seen = {}, set()
+        for job in jobs:
+            # Stretched jobs are split from a batch of their normal-speed words
+            utterance = self.stretch_base(job.utterance) or job.utterance
+            if not job.group or utterance in seen:
+                continue
+            if self.cache is not None and self.cache.lookup(utterance) is not None:
+                continue
+            if self.slicer is not None and self.slicer.covers(job.utterance):
+                continue
+            seen.add(utterance)
+            key = (job.group, utterance.provider, utterance.lang, utterance.speed)
+            groups.setdefault(key, []).append(utterance)
+
+        async def fetch_batch(group: str, utterances: list):
+            async with semaphore:
+                try:
+                    data, _ = await self.resolve(batch_utterance(utterances))
+                    clips = await asyncio.to_thread(split_clip, data, len(utterances))
+                except (BatchSplitError, DecodeError, ProviderError, *TRANSPORT_ERRORS) as e:
+                    print(f"  Batch {group} not split ({str(e)[:60]}); fetching its words one by one")
+                    return
+            for utterance, clip in zip(utterances, clips):
+                key = utterance_key(utterance)
+                self._batched[key] = clip
+                if self.cache is not None:
+                    path = self.cache.put(utterance, clip)
+                    if self.flights is not None:
+                        self.flights.publish(key, path.stem)
+
+        await asyncio.gather(*(
+            fetch_batch(key[0], batch)
+            for key, utterances in groups.items()
+            for batch in chunk_utterances(utterances)
+            if len(batch) > 1
+        ))
+
+    def _count_error(self, job: FetchJob, error: BaseException):
+        if self.metrics is not None:
+            self.metrics.inc('tts_job_errors_total', provider=job.utterance.provider,
+                             error=type(error).__name__)
+
+    async def _fetch_job(self, job: FetchJob) -> FetchResult:
+        if self.journal is not None:
+            self.journal.mark(job, IN_FLIGHT)
+        attempts = 0
+        error = ''
+        while attempts <= self.retries:
+            attempts += 1
+            try:
+                data, source = await self.resolve(job.utterance)
+                write_atomic(job.dest, data)
+                if self.index is not None:
+                    self.index.record(job.dest, data)
+                    # Don't hold SQLite's write lock for the whole run; other runs share the index
+                    self.index.commit()
+                if self.journal is not None:
+                    self.journal.mark(job, DONE)
+                status = {'network': 'downloaded', 'batch': 'batched', 'stretched': 'stretched',
+                          'stitched': 'stitched', 'sliced': 'sliced', 'cache': 'cached'}[source]
+                return FetchResult(job, status, size=len(data), attempts=attempts)
+            except CircuitOpenError as e:
+                error = str(e)
+                self._count_error(job, e)
+                break
+            except (ProviderError, *TRANSPORT_ERRORS) as e:
+                error = str(e)[:80]
+                self._count_error(job, e)
+            if attempts <= self.retries:
+                if self.metrics is not None:
+                    self.metrics.inc('tts_job_retries_total', provider=job.utterance.provider)
+                await asyncio.sleep(backoff_delay(attempts))
+        if self.journal is not None:
+            self.journal.mark(job, FAILED, error)
+        return FetchResult(job, 'failed', attempts=attempts, error=error)
+
+    def existing_size(self, dest: Path) -> Optional[int]:
+        """
+        Size of a usable clip already at dest, or None if it must be fetched.
+
+        Indexed files cost one stat() to make sure they are still there and
+        unchanged; unknown or changed ones are checked and recorded, and
+        invalid ones (e.g. saved HTML errors) are refetched.
+        """
+        if self.index is None:
+            return dest.stat().st_size if is_valid_file(dest) else None
+        row = self.index.lookup(dest)
+        if row is not None:
+            try:
+                st = dest.stat()
+            except FileNotFoundError:
+                self.index.forget(dest)
+                return None
+            if st.st_size != row['size'] or st.st_mtime_ns != row['mtime_ns']:
+                row = None
+        if row is None and is_valid_file(dest):
+            self.index.check(dest)
+            row = self.index.lookup(dest)
+        if row is not None and row['status'] == 'valid':
+            return row['size']
+        return None
+
+    async def run(self, jobs: list) -> list:
+        """Run all jobs and return one FetchResult per unique destination."""
+        if self.provider is not None:
+            jobs = [replace(job, utterance=replace(job.utterance, provider=self.provider)) for job in jobs]
+        unique = list({job.dest: job for job in jobs}.values())
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        def report(result: FetchResult) -> FetchResult:
+            nonlocal done
+            done += 1
+            if self.metrics is not None:
+                self.metrics.inc('tts_jobs_total', status=result.status)
+            self.on_result(result, done, len(unique))
+            return result
+
+        async def worker(job: FetchJob) -> FetchResult:
+            async with semaphore:
+                return report(await self._fetch_job(job))
+
+        try:
+            results = {}
+            todo = []
+            for job in unique:
+                # Jobs the journal has as done are checked like any other: the clip may have gone since
+                size = None if self.overwrite else self.existing_size(job.dest)
+                if size is not None:
+                    results[job.dest] = report(FetchResult(job, 'skipped', size=size))
+                else:
+                    todo.append(job)
+
+            if self.journal is not None:
+                self.journal.mark([job for job in todo if self.journal.state(job) is None], PENDING)
+            if self.batch:
+                await self._prefetch_batches(todo, semaphore)
+            for result in await asyncio.gather(*(worker(job) for job in todo)):
+                results[result.job.dest] = result
+            return [results[job.dest] for job in unique]
+        finally:
+            await self.aclose()
+            if self.cache is not None:
+                self.cache.save()
+            if self.index is not None:
+                self.index.commit()
+            if self.journal is not None:
+                self.journal.close()
+            if self.slicer is not None:
+                self.slicer.save()
+            limiters = {host: b for host, b in self._buckets.items() if isinstance(b, AdaptiveLimiter)}
+            if self.rates is not None and limiters:
+                self.rates.save(limiters)
+            if self.metrics is not None:
+                for host, limiter in limiters.items():
+                    self.metrics.set('tts_host_rate', round(limiter.rate, 3), host=host)
+                    self.metrics.set('tts_host_window', round(limiter.window, 3), host=host)
+                    self.metrics.inc('tts_host_rate_decreases_total', limiter.decreases, host=host)
+            if self.metrics is not None and self.metrics.histograms:
+                path = self.metrics.write(self.journal.path.stem if self.journal is not None else '')
+                for line in self.metrics.summary_lines():
+                    print(f"  {line}")
+                print(f"  Request metrics: {path}")
+
+    async def aclose(self):
+        """Close pooled connections."""
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+
+def run_jobs(jobs: list, **kwargs) -> list:
+    """Synchronous entry point for scripts: run jobs on a fresh event loop."""
+    return asyncio.run(FetchEngine(**kwargs).run(jobs))
+
+
+def print_progress(result: FetchResult, done: int, total: int):
+    """Default per-result reporter: quiet for skips, one line per fetch."""
+    if result.status == 'downloaded':
+        print(f"[{done}/{total}] ✓ {result.job.label} ({result.size} bytes)")
+    elif result.status == 'batched':
+        print(f"[{done}/{total}] ✓ {result.job.label} (split from batch)")
+    elif result.status == 'stretched':
+        print(f"[{done}/{total}] ✓ {result.job.label} (stretched to speed {result.job.utterance.speed:g})")
+    elif result.status == 'stitched':
+        print(f"[{done}/{total}] ✓ {result.job.label} ({result.size} bytes, stitched from sentences)")
+    elif result.status == 'sliced':
+        print(f"[{done}/{total}] ✓ {result.job.label} (cut from a recording)")
+    elif result.status == 'cached':
+        print(f"[{done}/{total}] ↺ {result.job.label} (from cache)")
+    elif result.status == 'failed':
+        print(f"[{done}/{total}] ✗ {result.job.label} - {result.error}")
+
+
+def print_summary(results: list) -> list:
+    """Print the usual end-of-run summary; returns the failed jobs."""
+    counts = {'downloaded': 0, 'batched': 0, 'stretched': 0, 'stitched': 0, 'sliced': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+    for result in results:
+        counts[result.status] += 1
+    failed = [r.job for r in results if r.status == 'failed']
+
+    print(f"\n=== Summary ===")
+    print(f"Total: {len(results)}")
+    print(f"Downloaded: {counts['downloaded']}")
+    if counts['batched']:
+        print(f"Split from batches: {counts['batched']}")
+    if counts['stretched']:
+        print(f"Stretched locally: {counts['stretched']}")
+    if counts['stitched']:
+        print(f"Stitched from sentences: {counts['stitched']}")
+    if counts['sliced']:
+        print(f"Cut from recordings: {counts['sliced']}")
+    print(f"From cache: {counts['cached']}")
+    print(f"Skipped (already exist): {counts['skipped']}")
+    print(f"Failed: {counts['failed']}")
+    if failed:
+        print(f"\nFailed ({len(failed)}): {', '.join(job.label for job in failed)}")
+    return failed
@@ -0,0 +1,161 @@
+"""
+Local stand-in for the Google Translate TTS and ttsmp3.com endpoints.
+
+Serves the same request shapes the providers send - GET /translate_tts,
+POST /makemp3_new.php answering with JSON that points at GET /mp3/<id> -
+with clips from the 'fake' provider, and misbehaves on demand: added
+latency, server errors, HTML throttle pages and a request rate above which
+it answers 429. Used by scripts/bench_fetch.py to measure the engine
+without touching the real services.
+
+Usage:
+    with FakeTTSServer(ServerBehavior(latency=0.05, rate_limit=50)) as server:
+        point_providers_at(server.url)
+        ...
+"""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .providers import PROVIDERS, FakeTTS, Utterance
+
+THROTTLE_PAGE = b'<html><body><h1>Unusual traffic from your computer network</h1></body></html>'
+
+
+@dataclass
+class ServerBehavior:
+    """How the stand-in responds; rates are fractions of requests."""
+    latency: float = 0.05                   # mean seconds before answering
+    jitter: float = 0.5                     # latency varies by +- this fraction
+    error_rate: float = 0.0                 # HTTP 500
+    throttle_rate: float = 0.0              # 200 with an HTML block page
+    rate_limit: Optional[float] = None      # requests/second before answering 429
+    seed: Optional[int] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: 'FakeTTSServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve(self, route):
+        status, body, content_type = self.server.answer(route)
+        self._send(status, body, content_type)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        if parts.path == '/translate_tts':
+            self._serve(lambda: self.server.clip(Utterance(
+                query.get('q', ''), lang=query.get('tl', 'zh-CN'), speed=float(query.get('ttsspeed', 1.0)))))
+        elif parts.path.startswith('/mp3/'):
+            self._serve(lambda: self.server.generated(parts.path[len('/mp3/'):]))
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if urlsplit(self.path).path != '/makemp3_new.php':
+            self._send(404, b'not found', 'text/plain')
+            return
+        form = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        self._serve(lambda: self.server.generate(form.get('msg', ''), form.get('lang', 'Zhiyu')))
+
+
+class FakeTTSServer(ThreadingHTTPServer):
+    """Threaded HTTP server on 127.0.0.1 (a free port by default), run in a background thread."""
+    daemon_threads = True
+
+    def __init__(self, behavior: ServerBehavior = None, port: int = 0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.behavior = behavior or ServerBehavior()
+        self.random = random.Random(self.behavior.seed)
+        self.requests = 0
+        self.statuses = {}
+        self._generated = {}
+        self._tokens = self.behavior.rate_limit or 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def _admit(self) -> Optional[tuple]:
+        """Count the request and decide its fate: None to serve it, else the canned response."""
+        behavior = self.behavior
+        with self._lock:
+            self.requests += 1
+            if behavior.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(behavior.rate_limit, self._tokens + (now - self._updated) * behavior.rate_limit)
+                self._updated = now
+                if self._tokens < 1:
+                    return 429, b'Too Many Requests', 'text/plain'
+                self._tokens -= 1
+            roll = self.random.random()
+            delay = behavior.latency * (1 + behavior.jitter * (2 * self.random.random() - 1))
+        time.sleep(max(0.0, delay))
+        if roll < behavior.error_rate:
+            return 500, b'Internal Server Error', 'text/plain'
+        if roll < behavior.error_rate + behavior.throttle_rate:
+            return 200, THROTTLE_PAGE, 'text/html'
+        return None
+
+    def answer(self, route) -> tuple:
+        response = self._admit() or route()
+        with self._lock:
+            self.statuses[response[0]] = self.statuses.get(response[0], 0) + 1
+        return response
+
+    def clip(self, utterance: Utterance) -> tuple:
+        return 200, FakeTTS().clip(utterance), 'audio/mpeg'
+
+    def generate(self, text: str, voice: str) -> tuple:
+        with self._lock:
+            clip_id = f'{len(self._generated)}.mp3'
+            self._generated[clip_id] = Utterance(text, lang=voice)
+        return 200, json.dumps({'URL': f'{self.url}/mp3/{clip_id}'}).encode(), 'application/json'
+
+    def generated(self, clip_id: str) -> tuple:
+        with self._lock:
+            utterance = self._generated.get(clip_id)
+        if utterance is None:
+            return 404, b'not found', 'text/plain'
+        return self.clip(utterance)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def point_providers_at(base_url: Optional[str]):
+    """Send the google and ttsmp3 providers to a stand-in at base_url (None restores the real services)."""
+    for name, path in (('google', '/translate_tts'), ('ttsmp3', '/makemp3_new.php')):
+        provider = PROVIDERS[name]
+        if base_url is None:
+            provider.__dict__.pop('url', None)
+        else:
+            provider.url = base_url + path
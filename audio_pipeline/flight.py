@@ -0,0 +1,103 @@
+"""
+Single-flight fetches across processes.
+
+The engine already shares one request between jobs of the same run asking
+for the same utterance. Download scripts run side by side (collocations,
+tingxie and curriculum regenerating at once) each have their own engine,
+though, and would all fetch a word they have in common.
+
+Before producing an utterance the engine takes an exclusive flock() on
+.audio_cache/flights/<key>.lock, key being the utterance key from cache.py
+(text, provider, lang, speed). A second process asking for the same
+utterance waits on that lock instead of fetching. The process holding it
+stores the clip in the shared object store and publishes its SHA-256 as
+<key>.json before letting go, so the waiter finds the clip there and copies
+it. The kernel releases the lock of a process that dies, so a crashed run
+never leaves a flight stuck; a flight that never published is simply
+fetched again by whoever gets the lock next.
+
+On platforms without fcntl (Windows) flights are not coordinated across
+processes.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .paths import CACHE_DIR
+
+FLIGHTS_DIR = CACHE_DIR / 'flights'
+
+POLL_INTERVAL = 0.1     # seconds between attempts on a lock another process holds
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+@contextlib.contextmanager
+def file_lock(path: Path):
+    """Blocking exclusive lock on a file, for short critical sections."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+class Flights:
+    """Cross-process locks and published results, one per utterance key."""
+
+    def __init__(self, root: Path = FLIGHTS_DIR):
+        self.root = Path(root)
+        self.waits = 0      # flights this process waited on instead of fetching
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key: str):
+        """Hold the flight for `key`, waiting (without blocking the loop) while another process does."""
+        if fcntl is None:
+            yield
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.root / f'{key}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if not _try_lock(fd):
+                self.waits += 1
+                while not _try_lock(fd):
+                    await asyncio.sleep(POLL_INTERVAL)
+            yield
+        finally:
+            os.close(fd)
+
+    def result(self, key: str) -> Optional[str]:
+        """SHA-256 of the clip an earlier flight for `key` stored, if any."""
+        try:
+            with open(self.root / f'{key}.json', 'r', encoding='utf-8') as f:
+                return json.load(f)['sha256']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def publish(self, key: str, digest: str):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f'{key}.json'
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.part')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'sha256': digest}, f)
+        os.replace(tmp, path)
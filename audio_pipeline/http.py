@@ -0,0 +1,209 @@
+"""
+Pooled keep-alive HTTP clients shared by all TTS providers.
+
+open_client() returns an httpx.AsyncClient-backed client (HTTP/2 when the
+`h2` package is installed) if httpx is available, and otherwise a stdlib
+pool of persistent http.client connections driven from worker threads.
+Either way a clip costs one round trip on an already-open TLS connection
+instead of a fresh connect/handshake (or a curl fork) per word.
+
+Both clients time each request's phases (dns, connect, ttfb, body; summed
+over redirects) into Response.timings for the engine's metrics. httpx does
+its DNS lookup inside the TCP connect, so it reports no separate 'dns'.
+"""
+
+import asyncio
+import http.client
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (enables http2=True in httpx)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+MAX_REDIRECTS = 5
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# Exceptions that mean "the request did not complete" for either client
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException) + ((httpx.HTTPError,) if httpx else ())
+
+
+@dataclass
+class Response:
+    """Minimal HTTP response passed to providers."""
+    status: int
+    body: bytes
+    headers: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)     # phase -> seconds
+
+
+def _add(timings: dict, phase: str, seconds: float):
+    timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+class _Trace:
+    """httpcore trace callback turning connection events into phase timings."""
+
+    def __init__(self):
+        self.timings = {}
+        self._started = {}
+
+    async def __call__(self, event: str, info: dict):
+        step, _, edge = event.rpartition('.')
+        now = time.perf_counter()
+        if edge == 'started':
+            self._started[step] = now
+            return
+        if edge != 'complete' or step not in self._started:
+            return
+        if step.endswith(('connect_tcp', 'connect_unix_socket', 'start_tls')):
+            _add(self.timings, 'connect', now - self._started[step])
+        elif step.endswith('receive_response_body'):
+            _add(self.timings, 'body', now - self._started[step])
+        elif step.endswith('receive_response_headers'):
+            sent = self._started.get(step.replace('receive_response_headers', 'send_request_headers'))
+            _add(self.timings, 'ttfb', now - (sent if sent is not None else self._started[step]))
+
+
+class HttpxClient:
+    """Async client on top of httpx with a shared connection pool."""
+
+    def __init__(self, max_connections: int, timeout: float):
+        self.http2 = HAS_HTTP2
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+
+    async def request(self, method: str, url: str, data: Optional[bytes] = None,
+                      headers: Optional[dict] = None) -> Response:
+        trace = _Trace()
+        response = await self._client.request(method, url, content=data, headers=headers,
+                                              extensions={'trace': trace})
+        return Response(response.status_code, response.content, dict(response.headers), trace.timings)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class PooledHttpClient:
+    """
+    Stdlib fallback: persistent http.client connections, one idle list per
+    (scheme, host, port). Requests run in worker threads so the event loop
+    keeps scheduling other fetches; the pool has its own thread per
+    connection, since asyncio's default executor may have fewer threads
+    than the engine has requests in flight.
+    """
+    http2 = False
+
+    def __init__(self, max_connections: int, timeout: float):
+        self.max_idle = max_connections
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='http')
+
+    def _connect(self, key: tuple) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: tuple) -> tuple:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key: tuple, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, method: str, url: str, data: Optional[bytes], headers: dict, timings: dict) -> tuple:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                if conn.sock is None:
+                    # Resolve first so the lookup is timed on its own; connect() then hits the resolver cache
+                    start = time.perf_counter()
+                    socket.getaddrinfo(conn.host, conn.port, type=socket.SOCK_STREAM)
+                    resolved = time.perf_counter()
+                    conn.connect()
+                    _add(timings, 'dns', resolved - start)
+                    _add(timings, 'connect', time.perf_counter() - resolved)
+                start = time.perf_counter()
+                conn.request(method, target, body=data, headers=headers)
+                response = conn.getresponse()
+                headers_at = time.perf_counter()
+                body = response.read()
+                _add(timings, 'ttfb', headers_at - start)
+                _add(timings, 'body', time.perf_counter() - headers_at)
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; retry on a fresh one
+                    continue
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return response, body
+
+    def request_sync(self, method: str, url: str, data: Optional[bytes] = None,
+                     headers: Optional[dict] = None) -> Response:
+        headers = dict(headers or {})
+        timings = {}
+        for _ in range(MAX_REDIRECTS + 1):
+            response, body = self._send(method, url, data, headers, timings)
+            location = response.getheader('Location')
+            if response.status not in REDIRECT_CODES or not location:
+                return Response(response.status, body, dict(response.getheaders()), timings)
+            url = urljoin(url, location)
+            if response.status == 303 or (response.status in (301, 302) and method == 'POST'):
+                method, data = 'GET', None
+                headers.pop('Content-Type', None)
+        raise http.client.HTTPException(f'too many redirects for {url}')
+
+    async def request(self, method: str, url: str, data: Optional[bytes] = None,
+                      headers: Optional[dict] = None) -> Response:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.request_sync, method, url, data, headers)
+
+    async def aclose(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+        self._executor.shutdown(wait=False)
+
+
+def open_client(max_connections: int, timeout: float):
+    """Best available pooled client for the current environment."""
+    if httpx is not None:
+        return HttpxClient(max_connections, timeout)
+    return PooledHttpClient(max_connections, timeout)
@@ -0,0 +1,175 @@
+"""
+Persistent index of audio files on disk.
+
+Records path, size, mtime, SHA-256 and validation status for every clip the
+pipeline has written or checked, in .audio_cache/index.sqlite3. Download
+runs consult the index instead of stat()ing and opening every existing MP3,
+so an incremental run only touches entries that are new or have changed.
+
+refresh() reconciles the index with the filesystem after files were added,
+edited or deleted by hand. It stats every file but only hashes those whose
+size or mtime moved, and looks for deleted files only in directories whose
+mtime moved since the last scan, so it too only pays for what changed.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from .mp3 import probe_bytes
+from .paths import CACHE_DIR, ROOT
+
+AUDIO_EXTENSIONS = ('.mp3',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+def validate(data: bytes) -> str:
+    """'valid' if the bytes are a complete, unbroken MP3 frame chain."""
+    return 'valid' if probe_bytes(data).valid else 'invalid'
+
+
+def index_key(path) -> str:
+    """Repository-relative path used as the primary key (no filesystem access)."""
+    path = os.path.abspath(path)
+    root = str(ROOT)
+    if path.startswith(root + os.sep):
+        return os.path.relpath(path, root)
+    return path
+
+
+class AudioIndex:
+    """SQLite-backed record of clip files and whether they are usable."""
+
+    def __init__(self, db_path: Path = CACHE_DIR / 'index.sqlite3'):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def lookup(self, path) -> Optional[sqlite3.Row]:
+        return self.db.execute('SELECT * FROM files WHERE path = ?', (index_key(path),)).fetchone()
+
+    def is_valid(self, path) -> bool:
+        """True if the index already knows this file as a valid clip (no disk I/O)."""
+        row = self.lookup(path)
+        return row is not None and row['status'] == 'valid'
+
+    def digest(self, path) -> Optional[str]:
+        """Indexed SHA-256 of a file, if its size and mtime still match the entry."""
+        row = self.lookup(path)
+        if row is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if st.st_size != row['size'] or st.st_mtime_ns != row['mtime_ns']:
+            return None
+        return row['sha256']
+
+    def record(self, path, data: bytes, status: Optional[str] = None) -> str:
+        """Record a file whose bytes we already hold (e.g. just written)."""
+        st = os.stat(path)
+        status = status or validate(data)
+        self.db.execute(
+            'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+            (index_key(path), st.st_size, st.st_mtime_ns,
+             hashlib.sha256(data).hexdigest(), status, time.time()),
+        )
+        return status
+
+    def check(self, path) -> Optional[str]:
+        """Read and validate a file, updating its entry; None if it does not exist."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.forget(path)
+            return None
+        return self.record(path, data)
+
+    def forget(self, path):
+        self.db.execute('DELETE FROM files WHERE path = ?', (index_key(path),))
+
+    def refresh(self, directories) -> dict:
+        """
+        Bring the index in line with the given directory trees.
+
+        Returns counts of 'checked', 'removed' and 'unchanged_dirs' (no file
+        added, removed or renamed; editing a file in place leaves its
+        directory's mtime alone, so files are compared there all the same).
+        """
+        stats = {'checked': 0, 'removed': 0, 'unchanged_dirs': 0}
+        pending = [Path(d) for d in directories]
+        while pending:
+            directory = pending.pop()
+            try:
+                dir_mtime = directory.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            key = index_key(directory)
+            row = self.db.execute('SELECT mtime_ns FROM dirs WHERE path = ?', (key,)).fetchone()
+            unchanged = row is not None and row['mtime_ns'] == dir_mtime
+
+            known = {r['path']: r for r in self.db.execute(
+                "SELECT * FROM files WHERE path LIKE ? ESCAPE '\\' AND path NOT LIKE ? ESCAPE '\\'",
+                (_like_prefix(key), _like_prefix(key) + '/%'))}
+            seen = set()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(Path(entry.path))
+                        continue
+                    if not entry.name.endswith(AUDIO_EXTENSIONS):
+                        continue
+                    file_key = index_key(entry.path)
+                    seen.add(file_key)
+                    st = entry.stat()
+                    old = known.get(file_key)
+                    if old is None or old['size'] != st.st_size or old['mtime_ns'] != st.st_mtime_ns:
+                        self.check(entry.path)
+                        stats['checked'] += 1
+
+            if unchanged:
+                stats['unchanged_dirs'] += 1
+                continue
+            for gone in set(known) - seen:
+                self.db.execute('DELETE FROM files WHERE path = ?', (gone,))
+                stats['removed'] += 1
+            self.db.execute('INSERT OR REPLACE INTO dirs VALUES (?, ?)', (key, dir_mtime))
+        self.commit()
+        return stats
+
+    def summary(self) -> dict:
+        """Number of indexed files per status."""
+        return dict(self.db.execute('SELECT status, COUNT(*) FROM files GROUP BY status').fetchall())
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def _like_prefix(key: str) -> str:
+    escaped = key.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '/%'
@@ -0,0 +1,204 @@
+"""
+Crash-safe job journal, backoff and circuit breaker for long download runs.
+
+JobJournal is an append-only JSON-lines write-ahead log in
+.audio_cache/journal/<name>.jsonl. Every state change (pending, in-flight,
+done, failed) is appended and flushed to disk before the engine moves on,
+so after a crash or Ctrl-C the next run replays the log and picks up exactly
+where the last one stopped: in-flight and failed jobs are retried, and done
+ones are skipped as long as their clip is still on disk.
+
+CircuitBreaker stops hammering a provider once it starts answering with HTML
+throttle pages, waits out a cooldown, and gives up on the run if the
+provider keeps refusing.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Optional
+
+from .cache import utterance_key
+from .index import index_key
+from .paths import CACHE_DIR
+
+PENDING = 'pending'
+IN_FLIGHT = 'in-flight'
+DONE = 'done'
+FAILED = 'failed'
+
+# Rewrite the log from the replayed state once it has this many superseded lines
+COMPACT_AFTER = 20000
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    """The provider kept throttling us; remaining jobs are left for the next run."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `threshold` throttled responses in a row the circuit opens: callers
+    wait `cooldown` seconds, then a single probe request is let through while
+    the rest keep waiting. A successful probe closes the circuit, a throttled
+    one reopens it. Once it has opened more than `max_trips` times, wait()
+    raises CircuitOpenError instead.
+
+    Callers pass failure() the time their request was sent: throttled answers
+    to requests already in flight when the circuit opened say nothing new
+    and neither extend the pause nor count as trips.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, cooldown: float = 60.0, max_trips: int = 3):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def ready(self) -> bool:
+        """Closed, or open with its cooldown over: a request may be tried without waiting."""
+        if not self.is_open:
+            return True
+        return self.trips <= self.max_trips and time.monotonic() >= self.opened_at + self.cooldown
+
+    async def wait(self):
+        """Block while the circuit is open; raise once the provider is given up on."""
+        while self.is_open:
+            if self.trips > self.max_trips:
+                raise CircuitOpenError(f'{self.name} throttled {self.trips} times, giving up')
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            elif not self._probing:
+                self._probing = True
+                return
+            else:
+                await asyncio.sleep(1)
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self, sent: Optional[float] = None):
+        """Record a throttled response to a request sent at `sent` (time.monotonic())."""
+        if self.is_open and (sent is None or sent < self.opened_at):
+            return
+        self.failures += 1
+        self._probing = False
+        if self.is_open or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            print(f"  {self.name} is throttling; pausing {self.cooldown:.0f}s (trip {self.trips})")
+
+    def release(self):
+        """The probe ended without a verdict (e.g. a timeout); let another through."""
+        self._probing = False
+
+
+class JobJournal:
+    """Append-only journal of job states, replayed on open."""
+
+    def __init__(self, name: str, root: Path = CACHE_DIR / 'journal'):
+        self.path = Path(root) / f'{name}.jsonl'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.states = {}
+        lines = self._replay()
+        if lines > COMPACT_AFTER and lines > 2 * len(self.states):
+            self._compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            self._file.write('\n')
+
+    @staticmethod
+    def job_key(job) -> str:
+        return index_key(job.dest)
+
+    def _replay(self) -> int:
+        if not self.path.exists():
+            return 0
+        lines = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    continue
+                self.states[entry['dest']] = entry
+        return lines
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _compact(self):
+        tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.part')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in self.states.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def state(self, job) -> str:
+        """
+        Last recorded state of a job; None if the journal has never seen it or
+        the destination is now wanted for a different utterance.
+        """
+        entry = self.states.get(self.job_key(job))
+        if entry is None or entry['utterance'] != utterance_key(job.utterance):
+            return None
+        return entry['state']
+
+    def is_done(self, job) -> bool:
+        return self.state(job) == DONE
+
+    def mark(self, jobs, state: str, error: str = ''):
+        """Append a state change for one job or a list of jobs and sync it to disk."""
+        if not isinstance(jobs, (list, tuple)):
+            jobs = [jobs]
+        lines = []
+        for job in jobs:
+            entry = {
+                'dest': self.job_key(job),
+                'utterance': utterance_key(job.utterance),
+                'state': state,
+                'time': round(time.time(), 3),
+            }
+            if error:
+                entry['error'] = error
+            self.states[entry['dest']] = entry
+            lines.append(json.dumps(entry, ensure_ascii=False) + '\n')
+        if lines:
+            self._file.write(''.join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def counts(self) -> dict:
+        counts = {}
+        for entry in self.states.values():
+            counts[entry['state']] = counts.get(entry['state'], 0) + 1
+        return counts
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,136 @@
+"""
+Per-host rate limiting that learns how fast each provider can be driven.
+
+Every host gets an AdaptiveLimiter: a token bucket (requests per second)
+plus a window of requests allowed in flight at once. Both follow AIMD,
+like TCP congestion control: each clean response adds a little (about
+INCREASE requests/second per second of clean traffic, and one more slot in
+the window per window's worth of responses), and every throttling signal -
+HTTP 429/503, an HTML page instead of audio, an undersized payload - halves
+them, at most once per DECREASE_INTERVAL so a burst of rejections from
+requests already in flight counts as one.
+
+The learned rate and window are saved to .audio_cache/rates.json at the end
+of a run and are where the next run starts, so a provider that tolerated 9
+requests a second yesterday isn't probed up from 5 again, and one that
+throttled at 3 isn't hammered at 5.
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from .flight import file_lock
+from .paths import CACHE_DIR
+
+RATES_PATH = CACHE_DIR / 'rates.json'
+
+INCREASE = 0.5            # requests/second added per second of clean responses
+DECREASE = 0.5            # factor applied on a throttling signal
+DECREASE_INTERVAL = 2.0   # seconds during which further signals don't compound
+MIN_RATE = 0.2
+MAX_RATE_FACTOR = 4.0     # never go above this multiple of the configured rate
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveLimiter(TokenBucket):
+    """Token bucket and in-flight window for one host, adjusted by AIMD."""
+
+    def __init__(self, rate: float, window: float, max_rate: float, max_window: int):
+        super().__init__(rate)
+        self.window = window
+        self.max_rate = max_rate
+        self.max_window = max_window
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._slots = asyncio.Condition()
+
+    def _set_rate(self, rate: float):
+        self.rate = min(self.max_rate, max(MIN_RATE, rate))
+        self.capacity = max(1.0, self.rate)
+
+    async def acquire(self):
+        """Wait for a slot in the window, then for a token."""
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < int(self.window))
+            self.in_flight += 1
+        try:
+            await super().acquire()
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    def success(self):
+        """A clean response: additive increase."""
+        self._set_rate(self.rate + INCREASE / self.rate)
+        self.window = min(self.max_window, self.window + 1 / self.window)
+
+    def throttled(self):
+        """A throttling signal: multiplicative decrease, once per interval."""
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_INTERVAL:
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self._set_rate(self.rate * DECREASE)
+        self.window = max(1.0, self.window * DECREASE)
+
+
+class RateStore:
+    """Learned per-host rates and windows persisted between runs."""
+
+    def __init__(self, path: Path = RATES_PATH):
+        self.path = Path(path)
+        self.entries = self._read()
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)['hosts']
+
+    def get(self, host: str) -> Optional[dict]:
+        return self.entries.get(host)
+
+    def save(self, limiters: dict):
+        """Store the limiters' rates, keeping the hosts other runs saved meanwhile."""
+        learned = {host: {'rate': round(limiter.rate, 3), 'window': round(limiter.window, 3),
+                          'updated': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                   for host, limiter in limiters.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_name(self.path.name + '.lock')):
+            self.entries = {**self._read(), **learned}
+            tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.part')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'hosts': self.entries}, f, indent=1)
+            os.replace(tmp, self.path)
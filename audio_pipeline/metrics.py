@@ -0,0 +1,202 @@
+"""
+Request metrics for download runs.
+
+Every provider request made through the engine records how long it waited
+for its host's rate limit, how long DNS, connecting (TCP + TLS), the first
+byte and the body took, how many bytes came back and with what status.
+The engine adds the retries and error classes of every job. Values go into
+fixed-bucket histograms per host, so a slow run shows at a glance whether
+the time went to queueing behind the rate limit, to slow responses or to
+retries.
+
+At the end of every run the engine writes the metrics to
+.audio_cache/metrics/<run>.json and, in the Prometheus text exposition
+format (for node_exporter's textfile collector), to <run>.prom.
+"""
+
+import bisect
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from .paths import CACHE_DIR
+
+METRICS_DIR = CACHE_DIR / 'metrics'
+
+# Upper bounds in seconds; a request phase rarely falls outside 5 ms .. 30 s
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Request phases, in order; 'queue' is the wait for the host's token bucket
+PHASES = ('queue', 'dns', 'connect', 'ttfb', 'body', 'total')
+
+HELP = {
+    'tts_request_seconds': 'Time spent in each phase of a provider request.',
+    'tts_response_bytes': 'Size of provider response bodies.',
+    'tts_requests_total': 'Provider requests by HTTP status.',
+    'tts_request_errors_total': 'Provider requests that raised, by exception class.',
+    'tts_job_errors_total': 'Failed job attempts, by exception class.',
+    'tts_job_retries_total': 'Job attempts beyond the first.',
+    'tts_jobs_total': 'Jobs by final status.',
+    'tts_run_seconds': 'Wall-clock duration of the run.',
+    'tts_backend_requests_total': "Requests the 'auto' provider sent to each backend, by outcome.",
+    'tts_hedged_requests_total': 'Second requests sent because the first exceeded its p95 latency.',
+    'tts_failovers_total': 'Requests retried on another backend after an error.',
+    'tts_flight_waits_total': 'Utterances another process was already fetching, waited for instead.',
+    'tts_host_rate': 'Learned request rate per host at the end of the run (requests/second).',
+    'tts_host_window': 'Learned number of requests allowed in flight per host.',
+    'tts_host_rate_decreases_total': 'Times a throttling signal halved the host rate.',
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)      # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (inf past the last bound)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {str(bound): count for bound, count in zip(self.bounds + ('+Inf',), self.counts)},
+        }
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    """Counters, gauges and histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels(labels))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, bounds: tuple = SECONDS_BUCKETS, **labels):
+        key = (name, _labels(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(bounds)
+        self.histograms[key].observe(value)
+
+    def record_request(self, host: str, queue: float, total: float, response):
+        """One completed request; `response.timings` holds the phases the HTTP client measured."""
+        self.observe('tts_request_seconds', queue, host=host, phase='queue')
+        for phase, seconds in response.timings.items():
+            self.observe('tts_request_seconds', seconds, host=host, phase=phase)
+        self.observe('tts_request_seconds', total, host=host, phase='total')
+        self.observe('tts_response_bytes', len(response.body), BYTES_BUCKETS, host=host)
+        self.inc('tts_requests_total', host=host, status=response.status)
+
+    def histogram(self, name: str, **labels):
+        return self.histograms.get((name, _labels(labels)))
+
+    def as_dict(self) -> dict:
+        def rows(items, value):
+            return [{'name': name, 'labels': dict(labels), **value(v)} for (name, labels), v in sorted(
+                items, key=lambda item: (item[0][0], [(k, str(v)) for k, v in item[0][1]]))]
+
+        return {
+            'version': 1,
+            'counters': rows(self.counters.items(), lambda v: {'value': v}),
+            'gauges': rows(self.gauges.items(), lambda v: {'value': v}),
+            'histograms': rows(self.histograms.items(), Histogram.as_dict),
+        }
+
+    def prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines, described = [], set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append(f'# HELP {name} {HELP[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), value in sorted(self.counters.items(), key=str):
+            describe(name, 'counter')
+            lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        for (name, labels), value in sorted(self.gauges.items(), key=str):
+            describe(name, 'gauge')
+            lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        for (name, labels), histogram in sorted(self.histograms.items(), key=str):
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.bounds + ('+Inf',), histogram.counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f'{bound:g}'
+                lines.append(f'{name}_bucket{_format_labels(labels, (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum:g}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, run: str = '', directory: Path = METRICS_DIR) -> Path:
+        """Write <run>.json and <run>.prom; returns the JSON path."""
+        run = run or Path(sys.argv[0]).stem or 'run'
+        self.set('tts_run_seconds', round(time.monotonic() - self.started, 3))
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{run}.json'
+        for target, text in ((path, json.dumps(self.as_dict(), indent=1)),
+                             (directory / f'{run}.prom', self.prometheus())):
+            tmp = target.with_name(f'{target.name}.{os.getpid()}.part')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, target)
+        return path
+
+    def summary_lines(self) -> list:
+        """Per-host p50/p90 of each phase, for the end-of-run printout."""
+        lines = []
+        hosts = sorted({dict(labels)['host'] for name, labels in self.histograms
+                        if name == 'tts_request_seconds'})
+        for host in hosts:
+            parts = []
+            for phase in PHASES:
+                histogram = self.histogram('tts_request_seconds', host=host, phase=phase)
+                if histogram is not None and histogram.count:
+                    parts.append(f'{phase} p50 ≤{histogram.quantile(0.5):g}s p90 ≤{histogram.quantile(0.9):g}s')
+            total = self.histogram('tts_request_seconds', host=host, phase='total')
+            lines.append(f'{host} ({total.count if total else 0} requests): ' + ', '.join(parts))
+        return lines
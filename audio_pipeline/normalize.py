@@ -0,0 +1,283 @@
+"""
+Loudness normalization and silence trimming for generated clips.
+
+ttsmp3 and Google TTS clips differ by several dB in loudness and carry
+uneven leading/trailing silence. Each clip is decoded to PCM, trimmed to its
+voiced span (plus a little padding), faded in/out to avoid clicks, scaled to
+a common speech loudness with a peak ceiling, and re-encoded. All of the
+signal math is vectorized NumPy over 10 ms frames.
+
+Results are cached by source hash in .audio_cache/normalized.json, with the
+normalized bytes stored as cache objects: a clip that was already processed
+(or is itself the output of a previous pass) is never decoded again, and the
+same source clip in several directories is processed once.
+
+Only word clips are touched: recordings (see peaks.is_recording) and any
+audio that timing data points into (CC1 paragraphs, reading passages,
+koushi lessons) keep their exact length, since trimming them would shift
+every timestamp recorded against them.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from . import pcm
+from .cache import AudioCache, sha256_bytes
+from .engine import write_atomic
+from .flight import file_lock
+from .paths import CACHE_DIR, ROOT, list_clips
+from .peaks import is_recording
+
+PUBLIC_DIR = ROOT / 'public'
+
+TARGET_DB = -20.0      # loudness of voiced frames, dBFS RMS
+PEAK_DB = -1.0         # never push a sample above this
+SILENCE_DB = -40       # frames quieter than this (relative to the peak) are silence
+PAD_MS = 60            # silence kept before and after the voiced span
+FADE_MS = 5
+FRAME_MS = 10
+# Clips already this close to the target with nothing to trim are left as-is,
+# so reruns never pay for another lossy re-encode
+TOLERANCE_DB = 0.5
+
+SETTINGS = {
+    'target_db': TARGET_DB,
+    'peak_db': PEAK_DB,
+    'silence_db': SILENCE_DB,
+    'pad_ms': PAD_MS,
+    'bitrate': pcm.MP3_BITRATE,
+}
+
+
+def voiced_span(samples: np.ndarray, sample_rate: int = pcm.SAMPLE_RATE,
+                silence_db: float = SILENCE_DB, pad_ms: int = PAD_MS) -> tuple:
+    """(start, end) sample range from the first to the last voiced frame, padded."""
+    db = pcm.frame_db(samples, sample_rate, FRAME_MS)
+    voiced = np.flatnonzero(db >= silence_db)
+    if len(voiced) == 0:
+        return 0, len(samples)
+    frame = sample_rate * FRAME_MS // 1000
+    pad = pad_ms // FRAME_MS
+    start = max(0, voiced[0] - pad) * frame
+    end = voiced[-1] + 1 + pad
+    end = len(samples) if end >= len(db) else end * frame
+    return int(start), int(end)
+
+
+def loudness_db(samples: np.ndarray, sample_rate: int = pcm.SAMPLE_RATE,
+                silence_db: float = SILENCE_DB) -> float:
+    """RMS level in dBFS over voiced frames only, so pauses don't drag it down."""
+    frame = max(1, sample_rate * FRAME_MS // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return -np.inf
+    frames = samples[:count * frame].reshape(count, frame)
+    energy = np.mean(frames * frames, axis=1)
+    gate = energy.max() * 10 ** (silence_db / 10)
+    voiced = energy[energy >= gate]
+    if voiced.size == 0 or voiced.mean() == 0:
+        return -np.inf
+    return float(10 * np.log10(voiced.mean()))
+
+
+def fade(samples: np.ndarray, sample_rate: int = pcm.SAMPLE_RATE, fade_ms: int = FADE_MS) -> np.ndarray:
+    """Short linear fade in and out."""
+    n = min(len(samples) // 2, sample_rate * fade_ms // 1000)
+    if n == 0:
+        return samples
+    out = samples.copy()
+    ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    out[:n] *= ramp
+    out[-n:] *= ramp[::-1]
+    return out
+
+
+def gain_db(samples: np.ndarray, sample_rate: int = pcm.SAMPLE_RATE,
+            target_db: float = TARGET_DB, peak_db: float = PEAK_DB) -> float:
+    """Gain that brings the clip to target_db without peaks above peak_db."""
+    level = loudness_db(samples, sample_rate)
+    peak = float(np.abs(samples).max()) if len(samples) else 0.0
+    if not np.isfinite(level) or peak == 0:
+        return 0.0
+    return min(target_db - level, peak_db - 20 * np.log10(peak))
+
+
+def process(samples: np.ndarray, sample_rate: int = pcm.SAMPLE_RATE):
+    """
+    Trim and normalize decoded samples.
+
+    Returns (samples, stats), or (None, stats) when the clip is already within
+    tolerance and has nothing to trim.
+    """
+    start, end = voiced_span(samples, sample_rate)
+    trimmed = samples[start:end]
+    gain = gain_db(trimmed, sample_rate)
+    stats = {
+        'trimmed_ms': (len(samples) - len(trimmed)) * 1000 // sample_rate,
+        'gain_db': round(gain, 2),
+    }
+    if stats['trimmed_ms'] < PAD_MS and abs(gain) < TOLERANCE_DB:
+        return None, stats
+    return fade(trimmed * np.float32(10 ** (gain / 20)), sample_rate), stats
+
+
+def normalize_clip(data: bytes):
+    """(mp3 bytes or None if unchanged, stats) for one clip."""
+    out, stats = process(pcm.decode(data))
+    return (None if out is None else pcm.encode(out)), stats
+
+
+def _normalize_path(path: str) -> tuple:
+    """Worker: (path, source sha256, output bytes or None, stats, error)."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        out, stats = normalize_clip(data)
+        return path, sha256_bytes(data), out, stats, ''
+    except (OSError, pcm.DecodeError) as e:
+        return path, '', None, {}, str(e)
+
+
+class NormalizeManifest:
+    """
+    Maps source clip hashes to their normalized hashes.
+
+    Outputs map to themselves, so a clip written by a previous pass is
+    recognised as done. The manifest is discarded when SETTINGS change.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR / 'normalized.json'):
+        self.path = Path(path)
+        self._added = {}
+        self.entries = self._read()
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest['entries'] if manifest.get('settings') == SETTINGS else {}
+
+    def get(self, digest: str):
+        return self.entries.get(digest)
+
+    def add(self, source: str, output: str):
+        self.entries[source] = self._added[source] = output
+        self.entries[output] = self._added[output] = output
+
+    def save(self):
+        """Write the manifest if anything was added, keeping what other runs saved meanwhile."""
+        if not self._added:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_name(self.path.name + '.lock')):
+            self.entries = {**self._read(), **self._added}
+            tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.part')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'settings': SETTINGS, 'entries': self.entries}, f, indent=1)
+            os.replace(tmp, self.path)
+        self._added = {}
+
+
+def timed_audio() -> set:
+    """Resolved paths of the audio files timing data refers to."""
+    timed = set()
+    texts = ROOT / 'cc1_audio_texts.json'
+    if texts.exists():
+        with open(texts, 'r', encoding='utf-8') as f:
+            # Stitched paragraphs; cc1_audio_timing.json holds their sentence offsets
+            timed.update(PUBLIC_DIR / 'audio' / 'cc1' / f'{key}.mp3' for key in json.load(f)['paragraphs'])
+    for path in (PUBLIC_DIR / 'data').glob('*.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            continue
+        # Reading passages: {"audioFile": "11_P3HCL.mp3", "timestamps": ...} or {"audio": "/audio/...", ...}
+        if isinstance(data.get('audioFile'), str):
+            timed.add(PUBLIC_DIR / 'audio' / data['audioFile'])
+        if isinstance(data.get('audio'), str):
+            timed.add(PUBLIC_DIR / data['audio'].lstrip('/'))
+    for path in (PUBLIC_DIR / 'audio').rglob('*_timing.json'):
+        stem = path.name[:-len('_timing.json')]
+        timed.update(path.parent.glob(f'{stem}.*'))
+    return {p.resolve() for p in timed}
+
+
+def word_clips(paths: list) -> list:
+    """The paths that are word clips: neither recordings nor audio with timing data."""
+    timed = timed_audio()
+    return [path for path in paths if Path(path).resolve() not in timed and not is_recording(path)]
+
+
+def normalize_tree(directories, workers: int = None, index=None, dry_run: bool = False,
+                   on_result=None, everything: bool = False) -> dict:
+    """
+    Normalize every word clip under `directories` in place (every clip with
+    `everything`; see the module docstring).
+
+    Clips whose hash is known to the manifest are either skipped (already
+    normalized) or restored from the cached output; the rest are decoded and
+    processed on a process pool. `index` (an AudioIndex) supplies hashes
+    without reading files and is updated for every rewritten clip.
+    Returns counts of 'skipped', 'reused', 'processed', 'unchanged',
+    'failed' and 'excluded' (recordings and timed audio left alone).
+    """
+    cache = AudioCache()
+    manifest = NormalizeManifest()
+    stats = {'skipped': 0, 'reused': 0, 'processed': 0, 'unchanged': 0, 'failed': 0, 'excluded': 0}
+
+    def replace(path, data):
+        if not dry_run:
+            write_atomic(Path(path), data)
+            if index is not None:
+                index.record(path, data)
+
+    paths = list_clips(directories)
+    if not everything:
+        clips = word_clips(paths)
+        stats['excluded'] = len(paths) - len(clips)
+        paths = clips
+
+    todo = {}    # source hash -> paths holding that clip
+    for path in paths:
+        digest = index.digest(path) if index is not None else None
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = sha256_bytes(f.read())
+        output = manifest.get(digest)
+        if output == digest:
+            stats['skipped'] += 1
+        elif output is not None and cache.object_path(output).exists():
+            replace(path, cache.object_path(output).read_bytes())
+            stats['reused'] += 1
+        else:
+            todo.setdefault(digest, []).append(path)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            firsts = [paths[0] for paths in todo.values()]
+            for path, source, out, clip_stats, error in pool.map(_normalize_path, firsts, chunksize=16):
+                paths = todo.get(source, [path])
+                if error:
+                    stats['failed'] += len(paths)
+                elif out is None:
+                    manifest.add(source, source)
+                    stats['unchanged'] += len(paths)
+                else:
+                    if not dry_run:
+                        manifest.add(source, cache.put_object(out))
+                    for target in paths:
+                        replace(target, out)
+                    stats['processed'] += len(paths)
+                if on_result:
+                    on_result(path, clip_stats, error)
+
+    if not dry_run:
+        manifest.save()
+        if index is not None:
+            index.commit()
+    return stats
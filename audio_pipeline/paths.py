@@ -0,0 +1,24 @@
+"""Well-known locations used by the audio pipeline."""
+
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Local state (cache objects, manifests); ignored by git and wrangler
+CACHE_DIR = ROOT / '.audio_cache'
+
+# Directory trees holding generated clips
+AUDIO_DIRS = [
+    ROOT / 'public' / 'audio',
+    ROOT / 'audio',
+]
+
+
+def list_clips(directories, extensions=('.mp3',)) -> list:
+    """Sorted paths of every clip under the given directory trees."""
+    paths = []
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            paths.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(extensions))
+    return sorted(paths)
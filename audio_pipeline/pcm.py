@@ -0,0 +1,69 @@
+"""
+PCM helpers: decode clips to NumPy arrays and encode them back to MP3.
+
+Decoding and encoding go through ffmpeg (already required by
+scripts/generate_word_video.py) over pipes, so no temporary files are written.
+Samples are mono float32 in [-1, 1].
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+# Google Translate TTS returns 24 kHz mono; use that throughout
+SAMPLE_RATE = 24000
+MP3_BITRATE = '48k'
+
+
+class DecodeError(Exception):
+    """Raised when ffmpeg cannot decode or encode a clip, or is not installed."""
+
+
+def _ffmpeg(args: list, data: bytes = None) -> bytes:
+    try:
+        result = subprocess.run(['ffmpeg', '-v', 'error', *args], input=data,
+                                capture_output=True, check=True)
+    except FileNotFoundError:
+        # Not an I/O error: callers fall back to doing without the PCM
+        raise DecodeError('ffmpeg is not installed')
+    except subprocess.CalledProcessError as e:
+        raise DecodeError(e.stderr.decode('utf-8', 'replace').strip()[:200])
+    return result.stdout
+
+
+def decode(source: Union[str, Path, bytes], sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode a file path or in-memory clip to mono float32 samples."""
+    if isinstance(source, bytes):
+        raw = _ffmpeg(['-i', 'pipe:0', '-f', 's16le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'], source)
+    else:
+        raw = _ffmpeg(['-i', str(source), '-f', 's16le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'])
+    return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+
+
+def to_s16le(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2').tobytes()
+
+
+def encode(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, fmt: str = 'mp3',
+           codec_args: tuple = ('-codec:a', 'libmp3lame', '-b:a', MP3_BITRATE)) -> bytes:
+    """Encode mono float32 samples; defaults to MP3 at MP3_BITRATE."""
+    return _ffmpeg(['-f', 's16le', '-ac', '1', '-ar', str(sample_rate), '-i', 'pipe:0',
+                    *codec_args, '-f', fmt, 'pipe:1'], to_s16le(samples))
+
+
+def transcode(source: Union[str, Path], codec_args: tuple, fmt: str) -> bytes:
+    """Transcode a file straight to another codec/container without a PCM round trip."""
+    return _ffmpeg(['-i', str(source), '-vn', '-map_metadata', '-1', *codec_args, '-f', fmt, 'pipe:1'])
+
+
+def frame_db(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 10) -> np.ndarray:
+    """Per-frame RMS level in dB relative to the loudest frame."""
+    frame = max(1, sample_rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-9
+    return 20 * np.log10(rms / rms.max())
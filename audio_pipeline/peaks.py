@@ -0,0 +1,157 @@
+"""
+Waveform peaks for long recordings.
+
+Drawing a waveform of a reading recording in the browser means fetching and
+decoding the whole file first. Instead, every long recording gets its
+waveform precomputed: the samples are decoded once (ffmpeg, via pcm.py) and
+reduced to one (min, max) pair per PIXELS_PER_SECOND-th of a second, stored
+next to the recording as <file>.dat (public/audio/11_P3HCL.mp3.dat), so the
+page fetches a few tens of KB and draws straight from it.
+
+The file is audiowaveform's binary format, version 1 with 8-bit samples, so
+waveform-data.js and peaks.js read it as is; all fields little-endian:
+
+    int32   version (1)
+    uint32  flags (1: 8-bit samples)
+    int32   sample rate
+    int32   samples per pixel
+    uint32  number of pixels
+    int8    min, max for each pixel
+
+Values are the raw sample range scaled to -128..127, not normalized per
+file, so a quiet recording looks quiet.
+"""
+
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from . import pcm
+from .engine import write_atomic
+from .mp3 import probe_file
+
+HEADER = struct.Struct('<iIiiI')
+VERSION = 1
+FLAG_8BIT = 1
+PIXELS_PER_SECOND = 100
+
+# .mpeg files here are MPEG audio, like the MP3s (public/audio/11_P3HCL.mpeg)
+MPEG_AUDIO_EXTENSIONS = ('.mp3', '.mpeg')
+RECORDING_EXTENSIONS = MPEG_AUDIO_EXTENSIONS + ('.mp4', '.m4a')
+# Word clips are a few KB; anything this large is worth a look ...
+LONG_BYTES = 256 * 1024
+# ... and MPEG audio this long is a recording rather than a clip
+LONG_SECONDS = 30
+
+
+def peaks_path(path) -> Path:
+    return Path(f'{path}.dat')
+
+
+def compute_peaks(samples: np.ndarray, samples_per_pixel: int) -> np.ndarray:
+    """
+    (pixels, 2) int8 array of each pixel's min and max sample. The last
+    pixel covers whatever samples are left, without padding, so a
+    recording that ends loud doesn't get a spurious 0 in its final range.
+    """
+    full = len(samples) // samples_per_pixel
+    blocks = np.asarray(samples[:full * samples_per_pixel], dtype=np.float32).reshape(full, samples_per_pixel)
+    pairs = np.stack([blocks.min(axis=1), blocks.max(axis=1)], axis=1)
+    tail = samples[full * samples_per_pixel:]
+    if len(tail):
+        pairs = np.concatenate([pairs, [[tail.min(), tail.max()]]])
+    return np.clip(np.round(pairs * 128), -128, 127).astype(np.int8)
+
+
+def encode_peaks(pairs: np.ndarray, sample_rate: int, samples_per_pixel: int) -> bytes:
+    return HEADER.pack(VERSION, FLAG_8BIT, sample_rate, samples_per_pixel, len(pairs)) + pairs.tobytes()
+
+
+def decode_peaks(data: bytes) -> tuple:
+    """(sample_rate, samples_per_pixel, (pixels, 2) int8 array) from a .dat file's bytes."""
+    version, flags, sample_rate, samples_per_pixel, length = HEADER.unpack_from(data)
+    if version != VERSION or not flags & FLAG_8BIT:
+        raise ValueError(f'unsupported peaks file (version {version}, flags {flags})')
+    pairs = np.frombuffer(data, dtype=np.int8, count=length * 2, offset=HEADER.size)
+    return sample_rate, samples_per_pixel, pairs.reshape(length, 2)
+
+
+def is_recording(path) -> bool:
+    """Large enough, and for MPEG audio long enough, to be a recording rather than a word clip."""
+    path = Path(path)
+    if path.suffix.lower() not in RECORDING_EXTENSIONS or path.stat().st_size < LONG_BYTES:
+        return False
+    if path.suffix.lower() in MPEG_AUDIO_EXTENSIONS:
+        info = probe_file(path)
+        return info.valid and info.duration >= LONG_SECONDS
+    return True
+
+
+def find_recordings(paths) -> list:
+    """Recordings among the given files and directory trees, sorted."""
+    found = []
+    for path in map(Path, paths):
+        if path.is_file():
+            found.append(path)
+            continue
+        for dirpath, _, filenames in os.walk(path):
+            found.extend(Path(dirpath) / name for name in filenames
+                         if is_recording(Path(dirpath) / name))
+    return sorted(found)
+
+
+def _peaks_for(job: tuple) -> tuple:
+    """Worker: (path, .dat bytes or None, duration_ms, error) for one recording."""
+    path, pixels_per_second = job
+    try:
+        samples = pcm.decode(path)
+    except (OSError, pcm.DecodeError) as e:
+        return path, None, 0, str(e)[:120]
+    samples_per_pixel = pcm.SAMPLE_RATE // pixels_per_second
+    data = encode_peaks(compute_peaks(samples, samples_per_pixel), pcm.SAMPLE_RATE, samples_per_pixel)
+    return path, data, len(samples) * 1000 // pcm.SAMPLE_RATE, ''
+
+
+def is_current(path: Path, pixels_per_second: int) -> bool:
+    """The recording's .dat exists, is newer than it and has the requested resolution."""
+    target = peaks_path(path)
+    try:
+        if target.stat().st_mtime_ns < path.stat().st_mtime_ns:
+            return False
+        with open(target, 'rb') as f:
+            header = f.read(HEADER.size)
+        return (len(header) == HEADER.size
+                and HEADER.unpack(header)[3] == pcm.SAMPLE_RATE // pixels_per_second)
+    except FileNotFoundError:
+        return False
+
+
+def build_peaks(recordings: list, pixels_per_second: int = PIXELS_PER_SECOND, workers: int = None,
+                force: bool = False, on_result=None) -> dict:
+    """
+    Write <recording>.dat for each recording on a process pool, skipping
+    those that are current. Returns counts of 'built', 'current' and 'failed'.
+    """
+    stats = {'built': 0, 'current': 0, 'failed': 0}
+    todo = []
+    for path in map(Path, recordings):
+        if not force and is_current(path, pixels_per_second):
+            stats['current'] += 1
+        else:
+            todo.append((str(path), pixels_per_second))
+    if not todo:
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, data, duration_ms, error in pool.map(_peaks_for, todo):
+            if data is None:
+                stats['failed'] += 1
+            else:
+                write_atomic(peaks_path(path), data)
+                stats['built'] += 1
+            if on_result:
+                on_result(path, len(data) if data else 0, duration_ms, error)
+    return stats
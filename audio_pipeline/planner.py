@@ -0,0 +1,179 @@
+"""
+One plan for every clip the site needs, across all vocabulary datasets.
+
+Each download script only knows its own JSON, so finding what is missing
+means running them all, each stat()ing its own files, and a word shared by
+three datasets is checked three times. The planner loads every dataset the
+site serves into one index of served clip path -> what to say, refreshes the
+AudioIndex for public/audio once, and takes the deduplicated set of clips
+that are missing or invalid from index lookups alone.
+
+The result is a work plan (.audio_cache/plan.json by default) listing one
+job per clip with the datasets that want it, which load_plan() turns back
+into FetchJobs for the engine. A clip two datasets want at different speeds
+or from different providers goes to the first dataset in DATASETS and is
+reported as a conflict.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .engine import FetchJob, write_atomic
+from .index import AudioIndex
+from .paths import CACHE_DIR, ROOT
+from .providers import Utterance
+
+PUBLIC_DIR = ROOT / 'public'
+DATA_DIR = PUBLIC_DIR / 'data'
+PLAN_PATH = CACHE_DIR / 'plan.json'
+
+# Fields holding the text a clip speaks, most specific first
+TEXT_FIELDS = ('simplified', 'sentence', 'characters', 'chinese', 'radical')
+
+
+@dataclass
+class Need:
+    """A served clip and the utterance that produces it."""
+    audio: str                                  # path under public/, as in the data files
+    utterance: Utterance
+    group: str = ''
+    datasets: list = field(default_factory=list)
+
+
+def _load(path) -> dict:
+    with open(DATA_DIR / path if not Path(path).is_absolute() else path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _spoken(node: dict) -> str:
+    """The node's text field, else the clip's file name (clips are named after their text)."""
+    for name in TEXT_FIELDS:
+        if isinstance(node.get(name), str) and node[name].strip():
+            return node[name].strip()
+    return Path(node['audio']).stem
+
+
+def audio_refs(node, group: str = '') -> list:
+    """(text, audio path, group) for every node with an 'audio' field, in document order."""
+    found = []
+    if isinstance(node, dict):
+        audio = node.get('audio')
+        if isinstance(audio, str) and audio.endswith('.mp3'):
+            found.append((_spoken(node), audio.lstrip('/'), group))
+        for child in node.values():
+            found.extend(audio_refs(child, group))
+    elif isinstance(node, list):
+        for child in node:
+            found.extend(audio_refs(child, group))
+    return found
+
+
+def _rows(path: str, prefix: str) -> list:
+    return [ref for row in _load(path)['vocabulary'] for ref in audio_refs(row, f"{prefix} row {row['row']}")]
+
+
+def _curriculum() -> list:
+    return [ref for level, data in _load('curriculum_p1_p3.json')['levels'].items()
+            for row in data['rows'] for ref in audio_refs(row, f"{level} row {row['row']}")]
+
+
+def _lesson2() -> list:
+    sections = _load('lessons/lesson2.json')['sections']
+    # The dictation list has no audio fields; the page builds audio/<chinese>.mp3
+    words = [(w['chinese'], f"audio/{w['chinese']}.mp3", '')
+             for w in sections.get('tingXieCiYu', {}).get('words', [])]
+    return audio_refs(sections) + words
+
+
+def _wupin() -> list:
+    return [(item['simplified'], f"audio/p3hcl-wupin/{item['simplified']}.mp3", '')
+            for item in _load('p3hcl-wupin-vocabulary.json')['vocabulary']]
+
+
+def _cc1() -> list:
+    with open(ROOT / 'cc1_audio_texts.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return ([(text, f"audio/cc1/{key}.mp3", '') for key, text in data['paragraphs'].items()]
+            + [(word, f"audio/cc1/word_{word}.mp3", '') for word in dict.fromkeys(data['vocab_words'])])
+
+
+def _reading() -> list:
+    return [ref for path in sorted(DATA_DIR.glob('p3hcl_reading_*_words.json'))
+            for ref in audio_refs(_load(path))]
+
+
+# name -> (loader, utterance settings), matching what each download script requests
+DATASETS = {
+    'tingxie': (lambda: _rows('tingxie/tingxie_vocabulary.json', 'tingxie'), {}),
+    'curriculum': (_curriculum, {'speed': 0.5}),
+    'school': (lambda: _rows('tingxie/school_vocabulary.json', 'school'), {'speed': 0.5}),
+    'collocations': (lambda: audio_refs(_load('tingxie/word_collocations.json')), {'provider': 'ttsmp3'}),
+    'radicals': (lambda: audio_refs(_load('radicals/radicals.json')), {'speed': 0.5}),
+    'lesson2': (_lesson2, {'speed': 0.5}),
+    'p3hcl-wupin': (_wupin, {'speed': 0.8}),
+    'cc1': (_cc1, {}),
+    'p3hcl-reading': (_reading, {'speed': 0.5}),
+}
+
+
+def collect_needs(datasets=None) -> tuple:
+    """(audio path -> Need, conflicts) over the given datasets (default: all)."""
+    needs, conflicts = {}, []
+    for name in datasets or DATASETS:
+        loader, settings = DATASETS[name]
+        for text, audio, group in loader():
+            utterance = Utterance(text, **settings)
+            need = needs.get(audio)
+            if need is None:
+                needs[audio] = Need(audio, utterance, group, [name])
+                continue
+            if name not in need.datasets:
+                need.datasets.append(name)
+            if utterance != need.utterance:
+                conflicts.append((audio, need.datasets[0], name))
+    return needs, conflicts
+
+
+def missing_needs(needs: dict, index: AudioIndex) -> list:
+    """(Need, 'missing' or status) for every clip the index doesn't hold as valid."""
+    index.refresh([PUBLIC_DIR / 'audio'])
+    todo = []
+    for audio, need in needs.items():
+        row = index.lookup(PUBLIC_DIR / audio)
+        if row is None:
+            todo.append((need, 'missing'))
+        elif row['status'] != 'valid':
+            todo.append((need, row['status']))
+    return todo
+
+
+def write_plan(todo: list, path: Path = PLAN_PATH, conflicts=()) -> dict:
+    """Write the work plan; returns it."""
+    plan = {
+        'version': 1,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'jobs': [{
+            'audio': need.audio,
+            'text': need.utterance.text,
+            'provider': need.utterance.provider,
+            'lang': need.utterance.lang,
+            'speed': need.utterance.speed,
+            'group': need.group,
+            'datasets': need.datasets,
+            'reason': reason,
+        } for need, reason in todo],
+        'conflicts': [{'audio': audio, 'kept': kept, 'dropped': dropped} for audio, kept, dropped in conflicts],
+    }
+    write_atomic(Path(path), json.dumps(plan, ensure_ascii=False, indent=1).encode('utf-8'))
+    return plan
+
+
+def load_plan(path: Path = PLAN_PATH) -> list:
+    """FetchJobs for every entry of a work plan."""
+    with open(path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    return [FetchJob(Utterance(job['text'], job['provider'], job['lang'], job['speed']),
+                     PUBLIC_DIR / job['audio'], label=job['audio'], group=job['group'])
+            for job in plan['jobs']]
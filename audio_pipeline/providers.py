@@ -0,0 +1,347 @@
+"""
+TTS providers used by the audio download scripts.
+
+Each provider turns an Utterance into MP3 bytes using the HTTP helpers
+exposed by the fetch engine, so rate limiting and retries live in one place.
+
+A provider is any object with a `name`, a `supports_speed` flag and an
+`async synthesize(http, utterance) -> bytes` that returns a checked MP3 or
+raises ProviderError (ThrottledError for "slow down"); register_provider()
+makes it available by name. Two need no network at all: 'espeak' runs the
+local espeak-ng synthesizer, and 'fake' returns deterministic silent clips
+at CPU speed, for CI and benchmarks.
+
+The 'auto' provider is not a service of its own: it routes each request to
+the healthiest real backend, judged by rolling latency and error rate, fails
+over to the next one on errors, and hedges - sends a second request to
+another backend - when the first is slower than its usual p95.
+"""
+
+import asyncio
+import hashlib
+import json
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Optional
+from urllib.parse import urlencode
+
+from .mp3 import parse_header, probe_bytes, silent_frame
+
+USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) '
+              'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+# Anything smaller than this is an error page or an empty clip, not speech
+MIN_AUDIO_BYTES = 1000
+
+# Statuses that mean "slow down" rather than "this request is bad"
+THROTTLE_STATUSES = (429, 503)
+
+
+class ProviderError(Exception):
+    """Raised when a provider returns something that is not usable audio."""
+
+
+class ThrottledError(ProviderError):
+    """The provider is rate limiting us (HTTP 429/503 or an HTML block page)."""
+
+
+def check_status(status: int, what: str = ''):
+    """Raise for non-200 responses, distinguishing throttling from other errors."""
+    if status == 200:
+        return
+    message = f'HTTP {status}' + (f' {what}' if what else '')
+    if status in THROTTLE_STATUSES:
+        raise ThrottledError(message)
+    raise ProviderError(message)
+
+
+@dataclass(frozen=True)
+class Utterance:
+    """A single piece of text to synthesize."""
+    text: str
+    provider: str = 'google'
+    lang: str = 'zh-CN'
+    speed: float = 1.0
+
+
+def check_audio(data: bytes, min_bytes: int = MIN_AUDIO_BYTES) -> bytes:
+    """Reject HTML error pages, undersized payloads and broken or truncated MP3s."""
+    if data.lstrip()[:1] == b'<':
+        raise ThrottledError('received HTML instead of audio')
+    if len(data) < min_bytes:
+        # Providers answer a throttled request with an empty or stub clip as often as with an error
+        raise ThrottledError(f'invalid file size: {len(data)} bytes')
+    info = probe_bytes(data)
+    if not info.valid:
+        raise ProviderError(f'invalid MP3: {info.error}')
+    return data
+
+
+class GoogleTTS:
+    """Google Translate TTS (translate.google.com/translate_tts)."""
+    name = 'google'
+    supports_speed = True
+    url = 'https://translate.google.com/translate_tts'
+
+    async def synthesize(self, http, utterance: Utterance) -> bytes:
+        params = {
+            'ie': 'UTF-8',
+            'q': utterance.text,
+            'tl': utterance.lang,
+            'client': 'tw-ob',
+        }
+        if utterance.speed != 1.0:
+            params['ttsspeed'] = f'{utterance.speed:g}'
+
+        response = await http.get(f'{self.url}?{urlencode(params)}', headers={
+            'User-Agent': USER_AGENT,
+            'Referer': 'https://translate.google.com/',
+        })
+        check_status(response.status)
+        return check_audio(response.body)
+
+
+class TTSMP3:
+    """ttsmp3.com: a POST returns JSON with the URL of the generated MP3."""
+    name = 'ttsmp3'
+    supports_speed = False
+    url = 'https://ttsmp3.com/makemp3_new.php'
+    # ttsmp3 voice for each Utterance.lang; voice names (Zhiyu) are passed through
+    voices = {'zh-CN': 'Zhiyu'}
+
+    async def synthesize(self, http, utterance: Utterance) -> bytes:
+        response = await http.post(self.url, data={
+            'msg': utterance.text,
+            'lang': self.voices.get(utterance.lang, utterance.lang),
+            'source': 'ttsmp3',
+        }, headers={
+            'User-Agent': USER_AGENT,
+            'Referer': 'https://ttsmp3.com/text-to-speech/Chinese%20Mandarin/',
+            'X-Requested-With': 'XMLHttpRequest',
+        })
+        check_status(response.status)
+
+        try:
+            result = json.loads(response.body)
+        except ValueError:
+            raise ProviderError('response was not JSON')
+        if 'URL' not in result:
+            raise ProviderError(f"no URL in response: {result.get('Error', result)}")
+
+        audio = await http.get(result['URL'], headers={'User-Agent': USER_AGENT})
+        check_status(audio.status, 'fetching generated MP3')
+        return check_audio(audio.body)
+
+
+class EspeakTTS:
+    """Offline synthesis with espeak-ng (needs the espeak-ng and ffmpeg binaries)."""
+    name = 'espeak'
+    supports_speed = True
+    # espeak-ng voice for each Utterance.lang; others are passed through lowercased
+    voices = {'zh-CN': 'cmn', 'zh-TW': 'cmn', 'en': 'en-us'}
+    words_per_minute = 150
+
+    def _run(self, utterance: Utterance) -> bytes:
+        from .pcm import DecodeError, decode, encode
+
+        voice = self.voices.get(utterance.lang, utterance.lang.lower())
+        rate = max(80, int(round(self.words_per_minute * utterance.speed)))
+        try:
+            result = subprocess.run(['espeak-ng', '-v', voice, '-s', str(rate), '--stdout', utterance.text],
+                                    capture_output=True, check=True)
+        except FileNotFoundError:
+            raise ProviderError('espeak-ng is not installed')
+        except subprocess.CalledProcessError as e:
+            raise ProviderError(f"espeak-ng failed: {e.stderr.decode('utf-8', 'replace').strip()[:80]}")
+        try:
+            return check_audio(encode(decode(result.stdout)))
+        except DecodeError as e:
+            raise ProviderError(f'could not encode espeak-ng output: {e}')
+
+    async def synthesize(self, http, utterance: Utterance) -> bytes:
+        return await asyncio.to_thread(self._run, utterance)
+
+
+class FakeTTS:
+    """
+    Deterministic offline clips: digital silence as long as the text would
+    take to say, with the SHA-256 of the utterance in every frame's
+    ancillary bytes, so each utterance gets its own valid, stable MP3.
+    """
+    name = 'fake'
+    supports_speed = True
+    # MPEG-2 Layer III, 48 kbps, 24 kHz mono: the format Google returns
+    header = bytes((0xFF, 0xF3, 0x64, 0xC0))
+    side_info = 9
+    ms_per_char = 250
+    lead_ms = 150
+
+    def clip(self, utterance: Utterance) -> bytes:
+        frame = silent_frame(self.header)
+        length, samples, sample_rate = parse_header(self.header)[:3]
+        frame_ms = samples * 1000 / sample_rate
+        duration = (self.lead_ms + self.ms_per_char * len(utterance.text)) / utterance.speed
+        count = max(-(-MIN_AUDIO_BYTES // length), int(round(duration / frame_ms)))
+        ident = json.dumps([utterance.text, utterance.lang, float(utterance.speed)], ensure_ascii=False)
+        digest = hashlib.sha256(ident.encode('utf-8')).digest()
+        ancillary = (digest * (length // len(digest) + 1))[:length - 4 - self.side_info]
+        return (frame[:4 + self.side_info] + ancillary) * count
+
+    async def synthesize(self, http, utterance: Utterance) -> bytes:
+        return check_audio(self.clip(utterance))
+
+
+# Rolling window of outcomes kept per backend
+HEALTH_WINDOW = 50
+# Hedge after this long until a backend has enough samples for a p95
+HEDGE_DELAY = 2.0
+MIN_SAMPLES = 10
+# At most this fraction of requests may be hedged, so a slow spell can't double the load
+HEDGE_BUDGET = 0.1
+
+
+class ProviderHealth:
+    """Latency and success of a backend's most recent requests."""
+
+    def __init__(self, window: int = HEALTH_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def record(self, ok: bool, latency: Optional[float] = None):
+        self.outcomes.append(ok)
+        if ok and latency is not None:
+            self.latencies.append(latency)
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def score(self) -> float:
+        """Expected seconds to a good clip; untried backends score 0 so each gets probed."""
+        if not self.outcomes:
+            return 0.0
+        median = self.quantile(0.5) or HEDGE_DELAY
+        return median / max(0.05, 1.0 - self.error_rate)
+
+
+class FailoverProvider:
+    """Routes each utterance to the healthiest backend, with failover and hedging."""
+    name = 'auto'
+    supports_speed = True
+
+    def __init__(self, backends: tuple = ('google', 'ttsmp3')):
+        self.backends = backends
+        self.health = {name: ProviderHealth() for name in backends}
+        self.requests = 0
+        self.hedges = 0
+
+    def ranked(self, http, utterance: Utterance) -> list:
+        """Usable backends, healthiest first: able to do the speed and not paused by their breaker."""
+        usable = [name for name in self.backends
+                  if (utterance.speed == 1.0 or PROVIDERS[name].supports_speed)
+                  and http.breaker(name).ready()]
+        return sorted(usable, key=lambda name: self.health[name].score())
+
+    def hedge_delay(self, name: str) -> float:
+        health = self.health[name]
+        if len(health.latencies) < MIN_SAMPLES:
+            return HEDGE_DELAY
+        return health.quantile(0.95)
+
+    def _count(self, http, metric: str, **labels):
+        if getattr(http, 'metrics', None) is not None:
+            http.metrics.inc(metric, **labels)
+
+    async def _attempt(self, http, name: str, utterance: Utterance) -> bytes:
+        breaker = http.breaker(name)
+        start = time.monotonic()
+        try:
+            data = await PROVIDERS[name].synthesize(http, replace(utterance, provider=name))
+        except asyncio.CancelledError:
+            # Lost a hedge race. If this was the slow one its health has to show it,
+            # or a backend that hangs stays ranked first and every request waits out the hedge
+            elapsed = time.monotonic() - start
+            if elapsed >= self.hedge_delay(name):
+                self.health[name].record(True, elapsed)
+                self._count(http, 'tts_backend_requests_total', backend=name, outcome='cancelled')
+            raise
+        except ThrottledError:
+            breaker.failure(start)
+            http.throttled()
+            self.health[name].record(False)
+            self._count(http, 'tts_backend_requests_total', backend=name, outcome='throttled')
+            raise
+        except Exception:
+            self.health[name].record(False)
+            self._count(http, 'tts_backend_requests_total', backend=name, outcome='error')
+            raise
+        breaker.success()
+        self.health[name].record(True, time.monotonic() - start)
+        self._count(http, 'tts_backend_requests_total', backend=name, outcome='ok')
+        return data
+
+    async def synthesize(self, http, utterance: Utterance) -> bytes:
+        queue = self.ranked(http, utterance)
+        if not queue:
+            raise ThrottledError(f"no backend available for '{utterance.text}' (all paused or unable)")
+        self.requests += 1
+        first = queue.pop(0)
+        pending = {asyncio.ensure_future(self._attempt(http, first, utterance))}
+        hedged = False
+        error = None
+        try:
+            while pending:
+                timeout = None
+                if not hedged and queue and self.hedges < HEDGE_BUDGET * self.requests:
+                    timeout = self.hedge_delay(first)
+                done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than this backend's p95: race a second backend against it
+                    hedged = True
+                    self.hedges += 1
+                    self._count(http, 'tts_hedged_requests_total')
+                    pending.add(asyncio.ensure_future(self._attempt(http, queue.pop(0), utterance)))
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending and queue:
+                    self._count(http, 'tts_failovers_total')
+                    pending.add(asyncio.ensure_future(self._attempt(http, queue.pop(0), utterance)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+PROVIDERS = {
+    GoogleTTS.name: GoogleTTS(),
+    TTSMP3.name: TTSMP3(),
+    FailoverProvider.name: FailoverProvider(),
+    EspeakTTS.name: EspeakTTS(),
+    FakeTTS.name: FakeTTS(),
+}
+
+
+def register_provider(provider):
+    """Make a provider (see the module docstring for the interface) available by its name."""
+    PROVIDERS[provider.name] = provider
+    return provider
+
+
+def get_provider(name: str):
+    """Look up a provider by name."""
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS provider '{name}' (known: {', '.join(PROVIDERS)})")
@@ -0,0 +1,136 @@
+"""
+Low-bitrate Opus and AAC renditions of the served clips.
+
+The MP3s under public/audio are stored at whatever bitrate the provider
+returned (64 kbps for Google). Speech needs far less: every clip is
+transcoded on a process pool to mono Opus at 20 kbps (Ogg) and AAC at
+32 kbps (ADTS, for browsers without Opus support) under
+public/audio-renditions/<format>/, mirroring the MP3 paths:
+
+    public/audio/cc1/绿豆.mp3 -> public/audio-renditions/opus/cc1/绿豆.opus
+                               -> public/audio-renditions/aac/cc1/绿豆.aac
+
+A rendition is rebuilt only when it is missing or older than its MP3, so
+reruns after a download only transcode new clips. The rendition map
+(public/audio-renditions/renditions.json) lists the formats and which MP3s
+have renditions; src/hooks/useAudioPlayer.ts loads it once and plays the
+best format the browser supports, falling back to the MP3.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import pcm
+from .engine import write_atomic
+from .paths import ROOT, list_clips
+
+PUBLIC_DIR = ROOT / 'public'
+SOURCE_DIR = PUBLIC_DIR / 'audio'
+RENDITIONS_DIR = PUBLIC_DIR / 'audio-renditions'
+MAP_PATH = RENDITIONS_DIR / 'renditions.json'
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    ext: str
+    mime: str
+    bitrate: str
+    codec_args: tuple
+    fmt: str
+
+
+# In order of preference; the player picks the first one the browser can play
+RENDITIONS = (
+    Rendition('opus', '.opus', 'audio/ogg; codecs=opus', '20k',
+              ('-ac', '1', '-codec:a', 'libopus', '-b:a', '20k', '-application', 'voip'), 'ogg'),
+    Rendition('aac', '.aac', 'audio/aac', '32k',
+              ('-ac', '1', '-codec:a', 'aac', '-b:a', '32k'), 'adts'),
+)
+
+
+def rendition_path(source: Path, rendition: Rendition) -> Path:
+    """Where the rendition of a public/audio clip lives."""
+    relative = Path(source).resolve().relative_to(SOURCE_DIR)
+    return RENDITIONS_DIR / rendition.name / relative.with_suffix(rendition.ext)
+
+
+def is_stale(source: Path, target: Path) -> bool:
+    try:
+        return target.stat().st_mtime_ns < Path(source).stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def _build(task: tuple) -> tuple:
+    """Worker: transcode one clip to one rendition; (source, name, size, error)."""
+    source, name = task
+    rendition = next(r for r in RENDITIONS if r.name == name)
+    try:
+        data = pcm.transcode(source, rendition.codec_args, rendition.fmt)
+        write_atomic(rendition_path(source, rendition), data)
+        return source, name, len(data), ''
+    except (OSError, pcm.DecodeError) as e:
+        return source, name, 0, str(e)
+
+
+def public_url(path: Path) -> str:
+    """URL the site serves a public/ file under."""
+    return '/' + Path(path).resolve().relative_to(PUBLIC_DIR).as_posix()
+
+
+def build_renditions(directories=(SOURCE_DIR,), workers: int = None, renditions=RENDITIONS,
+                     force: bool = False, on_result=None) -> dict:
+    """
+    Transcode every MP3 under `directories` (inside public/audio) that lacks
+    an up-to-date rendition, then rewrite the rendition map.
+
+    Returns counts of 'built', 'current', 'failed' and the byte totals
+    'source_bytes' and '<name>_bytes' over all clips in the map.
+    """
+    sources = list_clips(directories)
+    tasks = [(source, r.name) for source in sources for r in renditions
+             if force or is_stale(source, rendition_path(source, r))]
+    stats = {'built': 0, 'current': len(sources) * len(renditions) - len(tasks), 'failed': 0}
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for source, name, size, error in pool.map(_build, tasks, chunksize=16):
+                stats['failed' if error else 'built'] += 1
+                if on_result:
+                    on_result(source, name, size, error)
+
+    stats.update(write_map(renditions))
+    return stats
+
+
+def write_map(renditions=RENDITIONS) -> dict:
+    """
+    Write renditions.json for every public/audio clip whose renditions are
+    all present and current. Returns byte totals per format.
+    """
+    totals = {'source_bytes': 0, **{f'{r.name}_bytes': 0 for r in renditions}}
+    files = []
+    for source in list_clips([SOURCE_DIR]):
+        targets = [rendition_path(source, r) for r in renditions]
+        if any(is_stale(source, target) for target in targets):
+            continue
+        files.append(public_url(source)[len('/audio/'):])
+        totals['source_bytes'] += os.path.getsize(source)
+        for r, target in zip(renditions, targets):
+            totals[f'{r.name}_bytes'] += target.stat().st_size
+
+    rendition_map = {
+        'version': 1,
+        'source': '/audio/',
+        'base': public_url(RENDITIONS_DIR) + '/',
+        'formats': [{'name': r.name, 'ext': r.ext, 'mime': r.mime, 'bitrate': r.bitrate}
+                    for r in renditions],
+        'files': files,
+    }
+    RENDITIONS_DIR.mkdir(parents=True, exist_ok=True)
+    write_atomic(MAP_PATH, json.dumps(rendition_map, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return totals
@@ -0,0 +1,171 @@
+"""
+Minimal S3-compatible client for Cloudflare R2 (or any S3 stand-in).
+
+Signs requests with AWS Signature Version 4 using only the standard library
+and sends them through the pooled keep-alive client from http.py, so a bulk
+upload reuses a handful of TLS connections. Supports single PUTs and
+multipart uploads (create, upload part, complete, abort); objects are
+addressed path-style (<endpoint>/<bucket>/<key>), which both R2 and local
+stand-ins such as MinIO accept.
+"""
+
+import hashlib
+import hmac
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import quote, urlsplit
+from xml.sax.saxutils import escape
+
+from .http import open_client
+
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+
+class S3Error(Exception):
+    """The object store rejected a request."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f'HTTP {status}: {message}')
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
+@dataclass(frozen=True)
+class Credentials:
+    access_key: str
+    secret_key: str
+    region: str = 'auto'      # R2 accepts 'auto'; MinIO and AWS want a real region
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = '-_.~') -> str:
+    return quote(value, safe=safe)
+
+
+def sign(credentials: Credentials, method: str, url: str, headers: dict,
+         payload_sha256: str, amz_date: str, service: str = 's3') -> dict:
+    """
+    Headers for a SigV4-signed request: the given headers plus Host,
+    x-amz-date, x-amz-content-sha256 and Authorization.
+    """
+    parts = urlsplit(url)
+    date = amz_date[:8]
+    headers = {
+        **headers,
+        'Host': parts.netloc,
+        'x-amz-date': amz_date,
+        'x-amz-content-sha256': payload_sha256,
+    }
+    canonical_headers = {k.lower(): ' '.join(str(v).split()) for k, v in headers.items()}
+    signed_headers = ';'.join(sorted(canonical_headers))
+
+    query = []
+    for pair in parts.query.split('&') if parts.query else ():
+        key, _, value = pair.partition('=')
+        query.append((key, value))
+    canonical_query = '&'.join(f'{k}={v}' for k, v in sorted(query))
+
+    canonical_request = '\n'.join([
+        method,
+        parts.path or '/',
+        canonical_query,
+        ''.join(f'{k}:{canonical_headers[k]}\n' for k in sorted(canonical_headers)),
+        signed_headers,
+        payload_sha256,
+    ])
+    scope = f'{date}/{credentials.region}/{service}/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256',
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+    ])
+    key = _hmac(('AWS4' + credentials.secret_key).encode('utf-8'), date)
+    for part in (credentials.region, service, 'aws4_request'):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    headers['Authorization'] = (f'AWS4-HMAC-SHA256 Credential={credentials.access_key}/{scope}, '
+                                f'SignedHeaders={signed_headers}, Signature={signature}')
+    return headers
+
+
+def _xml_value(body: bytes, tag: str) -> Optional[str]:
+    match = re.search(rf'<{tag}>(.*?)</{tag}>'.encode(), body, re.S)
+    return match.group(1).decode('utf-8') if match else None
+
+
+def _header(headers: dict, name: str) -> Optional[str]:
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class S3Client:
+    """Async S3 operations on one bucket over a pooled HTTP client."""
+
+    def __init__(self, endpoint: str, bucket: str, credentials: Credentials,
+                 max_connections: int = 16, timeout: float = 60.0):
+        self.endpoint = endpoint.rstrip('/')
+        self.bucket = bucket
+        self.credentials = credentials
+        self.http = open_client(max_connections, timeout)
+
+    def object_url(self, key: str, query: str = '') -> str:
+        url = f'{self.endpoint}/{_uri_encode(self.bucket)}/{_uri_encode(key, safe="-_.~/")}'
+        return f'{url}?{query}' if query else url
+
+    async def request(self, method: str, key: str, query: str = '', data: bytes = b'',
+                      headers: Optional[dict] = None):
+        amz_date = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        payload_sha256 = hashlib.sha256(data).hexdigest() if data else EMPTY_SHA256
+        url = self.object_url(key, query)
+        signed = sign(self.credentials, method, url, headers or {}, payload_sha256, amz_date)
+        response = await self.http.request(method, url, data=data or None, headers=signed)
+        if response.status >= 300:
+            message = _xml_value(response.body, 'Message') or _xml_value(response.body, 'Code') or ''
+            raise S3Error(response.status, message or response.body[:200].decode('utf-8', 'replace'))
+        return response
+
+    async def put_object(self, key: str, data: bytes, headers: dict) -> str:
+        """Upload in a single request; returns the ETag."""
+        response = await self.request('PUT', key, data=data, headers=headers)
+        return (_header(response.headers, 'etag') or '').strip('"')
+
+    async def create_multipart_upload(self, key: str, headers: dict) -> str:
+        response = await self.request('POST', key, 'uploads=', headers=headers)
+        upload_id = _xml_value(response.body, 'UploadId')
+        if not upload_id:
+            raise S3Error(response.status, 'no UploadId in response')
+        return upload_id
+
+    async def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        query = f'partNumber={number}&uploadId={_uri_encode(upload_id)}'
+        response = await self.request('PUT', key, query, data=data)
+        return (_header(response.headers, 'etag') or '').strip('"')
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, etags: list) -> str:
+        parts = ''.join(f'<Part><PartNumber>{n}</PartNumber><ETag>"{escape(etag)}"</ETag></Part>'
+                        for n, etag in enumerate(etags, 1))
+        body = f'<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>'.encode('utf-8')
+        response = await self.request('POST', key, f'uploadId={_uri_encode(upload_id)}', data=body,
+                                      headers={'Content-Type': 'application/xml'})
+        # S3 can report a failed completion with a 200 and an <Error> body
+        if b'<Error>' in response.body:
+            raise S3Error(500, _xml_value(response.body, 'Message') or 'multipart completion failed')
+        return (_xml_value(response.body, 'ETag') or '').replace('&quot;', '').strip('"')
+
+    async def abort_multipart_upload(self, key: str, upload_id: str):
+        await self.request('DELETE', key, f'uploadId={_uri_encode(upload_id)}')
+
+    async def aclose(self):
+        await self.http.aclose()
@@ -0,0 +1,178 @@
+"""
+Audio sprites: one file per vocabulary row or lesson.
+
+A practice session plays a whole row of words, each a separate
+audio/<word>.mp3 request. A sprite concatenates the row's clips into one MP3
+with a short silence between them, and the sprite index records where each
+clip starts and how long it lasts, so one fetch serves the whole session.
+
+Clips from one provider share a single MPEG format, so sprites are built by
+concatenating their frames directly, with silent frames as gaps: nothing is
+re-encoded and offsets fall exactly on frame boundaries. A row that mixes
+formats is decoded to PCM and re-encoded instead.
+
+Each clip's entry is [offset_ms, duration_ms], plus the clip's leading
+silence from the clip index (clipinfo.py) when it has been measured, so a
+player can seek straight to the speech.
+
+Layout:
+    public/audio-sprites/tingxie/row-1.mp3
+    public/audio-sprites/tingxie.json    {"sprites": {"row-1": {"url": ..., "clips": {...}}}}
+"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from . import mp3, pcm
+from .clipinfo import clip_info
+from .engine import write_atomic
+from .paths import ROOT
+
+PUBLIC_DIR = ROOT / 'public'
+SPRITES_DIR = PUBLIC_DIR / 'audio-sprites'
+GAP_MS = 250
+
+
+@dataclass
+class Sprite:
+    """A named group of clips packed into one file."""
+    name: str
+    clips: list                                    # audio paths as written in the data files
+    missing: list = field(default_factory=list)
+
+
+def clip_file(audio: str) -> Path:
+    """Data files reference clips relative to public/ ('audio/外面.mp3')."""
+    return PUBLIC_DIR / audio.lstrip('/')
+
+
+def collect_audio(node) -> list:
+    """Every 'audio' path under a JSON node, in document order, without repeats."""
+    found = []
+
+    def walk(value):
+        if isinstance(value, dict):
+            audio = value.get('audio')
+            if isinstance(audio, str) and audio.endswith('.mp3') and audio not in found:
+                found.append(audio)
+            for child in value.values():
+                walk(child)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child)
+
+    walk(node)
+    return found
+
+
+def _pack_frames(datas: list, gap_ms: int) -> tuple:
+    """Concatenate clips frame by frame; (bytes, [(offset_ms, duration_ms)]) or None if formats differ."""
+    frames = [mp3.audio_frames(data) for data in datas]
+    first = mp3.parse_header(frames[0][0][:4])
+    fmt = (first[2], first[3], first[5], first[6])
+    for clip in frames:
+        parsed = mp3.parse_header(clip[0][:4])
+        if (parsed[2], parsed[3], parsed[5], parsed[6]) != fmt:
+            return None
+
+    frame_ms = first[1] * 1000 / first[2]
+    gap = [mp3.silent_frame(frames[0][0])] * math.ceil(gap_ms / frame_ms)
+    out, entries, position = [], [], 0
+    for i, clip in enumerate(frames):
+        if i:
+            out.extend(gap)
+            position += len(gap)
+        entries.append((round(position * frame_ms), round(len(clip) * frame_ms)))
+        out.extend(clip)
+        position += len(clip)
+    return b''.join(out), entries
+
+
+def _pack_pcm(datas: list, gap_ms: int) -> tuple:
+    """Decode, join with silence and re-encode; offsets in samples."""
+    gap = np.zeros(pcm.SAMPLE_RATE * gap_ms // 1000, dtype=np.float32)
+    parts, entries, position = [], [], 0
+    for i, data in enumerate(datas):
+        samples = pcm.decode(data)
+        if i and len(gap):
+            parts.append(gap)
+            position += len(gap)
+        entries.append((position * 1000 // pcm.SAMPLE_RATE, len(samples) * 1000 // pcm.SAMPLE_RATE))
+        parts.append(samples)
+        position += len(samples)
+    return pcm.encode(np.concatenate(parts)), entries
+
+
+def pack(datas: list, gap_ms: int = GAP_MS) -> tuple:
+    """(sprite bytes, [(offset_ms, duration_ms)]) for a list of MP3 clips."""
+    return _pack_frames(datas, gap_ms) or _pack_pcm(datas, gap_ms)
+
+
+def _public_url(path: Path) -> str:
+    return '/' + path.relative_to(PUBLIC_DIR).as_posix()
+
+
+def build_sprites(dataset: str, sprites: list, force: bool = False, on_sprite=None) -> dict:
+    """
+    Pack each Sprite into public/audio-sprites/<dataset>/<name>.mp3 and write
+    the dataset's index. A sprite is rebuilt only when its clip list changed
+    or one of its clips is newer than the sprite file.
+
+    Returns counts of 'built', 'current', 'failed' and 'missing' clips.
+    """
+    out_dir = SPRITES_DIR / dataset
+    index_path = SPRITES_DIR / f'{dataset}.json'
+    old = {}
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            old = json.load(f)['sprites']
+
+    stats = {'built': 0, 'current': 0, 'failed': 0, 'missing': 0}
+    index = {}
+    for sprite in sprites:
+        present = [a for a in sprite.clips if clip_file(a).exists()]
+        sprite.missing = [a for a in sprite.clips if a not in present]
+        stats['missing'] += len(sprite.missing)
+        if not present:
+            continue
+
+        path = out_dir / f'{sprite.name}.mp3'
+        previous = old.get(sprite.name)
+        if (not force and previous is not None and list(previous['clips']) == present
+                and path.exists()
+                and all(clip_file(a).stat().st_mtime_ns <= path.stat().st_mtime_ns for a in present)):
+            index[sprite.name] = previous
+            stats['current'] += 1
+            continue
+
+        try:
+            data, entries = pack([clip_file(a).read_bytes() for a in present])
+        except (ValueError, pcm.DecodeError) as e:
+            stats['failed'] += 1
+            if on_sprite:
+                on_sprite(sprite, str(e))
+            continue
+        write_atomic(path, data)
+        clips = {}
+        for audio, entry in zip(present, entries):
+            info = clip_info(clip_file(audio))
+            clips[audio] = list(entry) + ([info.lead_ms] if info is not None and info.lead_ms is not None else [])
+        index[sprite.name] = {
+            'url': _public_url(path),
+            'duration_ms': entries[-1][0] + entries[-1][1],
+            'clips': clips,
+        }
+        stats['built'] += 1
+        if on_sprite:
+            on_sprite(sprite, '')
+
+    for stale in out_dir.glob('*.mp3') if out_dir.exists() else ():
+        if stale.stem not in index:
+            stale.unlink()
+    write_atomic(index_path, json.dumps({'version': 1, 'gap_ms': GAP_MS, 'sprites': index},
+                                        ensure_ascii=False, indent=1).encode('utf-8'))
+    return stats
@@ -0,0 +1,265 @@
+"""
+Bulk uploader for R2 that only sends what changed.
+
+Every uploaded object is recorded in .audio_cache/uploads/<host>-<bucket>.json
+(one manifest per endpoint and bucket, so a test run against a local MinIO
+never passes for an R2 upload) with the SHA-256 and size of the file it
+came from. A run hashes the local files (taking hashes from the audio index
+where it is current), diffs them against the manifest and uploads only new
+or changed objects, concurrently over a pooled connection. Files above MULTIPART_THRESHOLD go up as concurrent
+multipart uploads. Every object gets a proper Content-Type and
+Cache-Control header.
+"""
+
+import asyncio
+import json
+import mimetypes
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from .cache import sha256_bytes
+from .flight import file_lock
+from .http import TRANSPORT_ERRORS
+from .journal import backoff_delay
+from .paths import CACHE_DIR
+from .s3 import Credentials, S3Client, S3Error
+
+MULTIPART_THRESHOLD = 16 * 1024 * 1024
+PART_SIZE = 8 * 1024 * 1024          # S3 minimum is 5 MiB (except the last part)
+DEFAULT_CONCURRENCY = 16
+RETRIES = 3
+# Save the manifest this often so an interrupted run keeps its progress
+SAVE_EVERY = 200
+
+CONTENT_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.opus': 'audio/ogg; codecs=opus',
+    '.aac': 'audio/aac',
+    '.m4a': 'audio/mp4',
+    '.wav': 'audio/wav',
+    '.mp4': 'video/mp4',
+    '.json': 'application/json; charset=utf-8',
+    '.dat': 'application/octet-stream',         # waveform peaks (peaks.py)
+}
+# Clips are replaced in place when regenerated, so cache for a day rather than forever;
+# indexes and maps change with every build
+CACHE_CONTROL = {
+    '.json': 'public, max-age=300',
+}
+DEFAULT_CACHE_CONTROL = 'public, max-age=86400'
+
+
+def content_type(path) -> str:
+    ext = Path(path).suffix.lower()
+    return CONTENT_TYPES.get(ext) or mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+
+
+def cache_control(path) -> str:
+    return CACHE_CONTROL.get(Path(path).suffix.lower(), DEFAULT_CACHE_CONTROL)
+
+
+@dataclass
+class UploadItem:
+    path: Path
+    key: str
+    sha256: str
+    size: int
+
+
+@dataclass
+class UploadResult:
+    item: UploadItem
+    status: str                  # 'uploaded' or 'failed'
+    parts: int = 1
+    error: str = ''
+
+
+class UploadManifest:
+    """Object key -> {'sha256', 'size'} of what was last uploaded to one bucket of one endpoint."""
+
+    def __init__(self, bucket: str, endpoint: str, root: Path = CACHE_DIR / 'uploads'):
+        host = re.sub(r'[^A-Za-z0-9.-]', '_', urlsplit(endpoint).netloc or endpoint)
+        self.path = Path(root) / f'{host}-{bucket}.json'
+        legacy = Path(root) / f'{bucket}.json'
+        if not self.path.exists() and legacy.exists() and host.endswith('.r2.cloudflarestorage.com'):
+            # Manifests used to be keyed by bucket alone, and were written by R2 runs
+            self.path = legacy
+        self._added = {}
+        self.entries = self._read()
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)['entries']
+
+    def is_current(self, item: UploadItem) -> bool:
+        entry = self.entries.get(item.key)
+        return entry is not None and entry['sha256'] == item.sha256 and entry['size'] == item.size
+
+    def record(self, item: UploadItem):
+        self.entries[item.key] = self._added[item.key] = {'sha256': item.sha256, 'size': item.size}
+
+    def save(self):
+        """Write the manifest, keeping what other runs saved meanwhile."""
+        if not self._added:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path.with_name(self.path.name + '.lock')):
+            self.entries = {**self._read(), **self._added}
+            tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.part')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        self._added = {}
+
+
+def scan(directories, base: Path, prefix: str = '', index=None) -> list:
+    """
+    UploadItems for every file with a known content type under `directories`.
+    Keys are `prefix` + the path relative to `base`, with '/' separators.
+    """
+    items = []
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for name in sorted(filenames):
+                if name.startswith('.') or Path(name).suffix.lower() not in CONTENT_TYPES:
+                    continue
+                path = Path(dirpath) / name
+                digest = index.digest(path) if index is not None else None
+                if digest is None:
+                    digest = sha256_bytes(path.read_bytes())
+                key = prefix + path.resolve().relative_to(Path(base).resolve()).as_posix()
+                items.append(UploadItem(path, key, digest, path.stat().st_size))
+    return items
+
+
+class Uploader:
+    """Uploads UploadItems concurrently, single PUT or multipart by size."""
+
+    def __init__(self, client: S3Client, concurrency: int = DEFAULT_CONCURRENCY,
+                 retries: int = RETRIES, on_result=None):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # Files held in memory at once; separate from the request slots, which multipart parts share
+        self.files = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.on_result = on_result
+
+    async def _with_retries(self, operation, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    return await operation(*args)
+            except S3Error as e:
+                if not e.retryable or attempt == self.retries:
+                    raise
+            except TRANSPORT_ERRORS:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+    def _headers(self, item: UploadItem) -> dict:
+        return {
+            'Content-Type': content_type(item.path),
+            'Cache-Control': cache_control(item.path),
+            'x-amz-meta-sha256': item.sha256,
+        }
+
+    async def _multipart(self, item: UploadItem, data: bytes) -> int:
+        upload_id = await self._with_retries(self.client.create_multipart_upload, item.key, self._headers(item))
+        chunks = [data[i:i + PART_SIZE] for i in range(0, len(data), PART_SIZE)]
+        try:
+            etags = await asyncio.gather(*(
+                self._with_retries(self.client.upload_part, item.key, upload_id, number, chunk)
+                for number, chunk in enumerate(chunks, 1)
+            ))
+            await self._with_retries(self.client.complete_multipart_upload, item.key, upload_id, list(etags))
+        except BaseException:
+            try:
+                await self.client.abort_multipart_upload(item.key, upload_id)
+            except (S3Error, *TRANSPORT_ERRORS):
+                pass
+            raise
+        return len(chunks)
+
+    async def upload(self, item: UploadItem) -> UploadResult:
+        try:
+            async with self.files:
+                data = await asyncio.to_thread(item.path.read_bytes)
+                if len(data) > MULTIPART_THRESHOLD:
+                    parts = await self._multipart(item, data)
+                else:
+                    await self._with_retries(self.client.put_object, item.key, data, self._headers(item))
+                    parts = 1
+            result = UploadResult(item, 'uploaded', parts)
+        except (S3Error, *TRANSPORT_ERRORS) as e:
+            result = UploadResult(item, 'failed', error=str(e))
+        if self.on_result:
+            self.on_result(result)
+        return result
+
+    async def run(self, items: list) -> list:
+        try:
+            return await asyncio.gather(*(self.upload(item) for item in items))
+        finally:
+            await self.client.aclose()
+
+
+def sync(client: S3Client, items: list, manifest: UploadManifest, force: bool = False,
+         dry_run: bool = False, concurrency: int = DEFAULT_CONCURRENCY,
+         on_result=None) -> tuple:
+    """
+    Upload the items the manifest doesn't already have. Returns
+    (pending items, results); results is empty on a dry run.
+    """
+    pending = [item for item in items if force or not manifest.is_current(item)]
+    if dry_run or not pending:
+        return pending, []
+
+    uploaded = 0
+
+    def record(result: UploadResult):
+        nonlocal uploaded
+        if result.status == 'uploaded':
+            manifest.record(result.item)
+            uploaded += 1
+            if uploaded % SAVE_EVERY == 0:
+                manifest.save()
+        if on_result:
+            on_result(result)
+
+    uploader = Uploader(client, concurrency=concurrency, on_result=record)
+    try:
+        results = asyncio.run(uploader.run(pending))
+    finally:
+        manifest.save()
+    return pending, results
+
+
+def endpoint_from_env(endpoint: Optional[str] = None) -> str:
+    """`endpoint`, else R2_ENDPOINT, else the R2 endpoint of R2_ACCOUNT_ID."""
+    endpoint = endpoint or os.environ.get('R2_ENDPOINT')
+    if not endpoint:
+        account = os.environ.get('R2_ACCOUNT_ID')
+        if not account:
+            raise ValueError('set R2_ENDPOINT or R2_ACCOUNT_ID (or pass --endpoint)')
+        endpoint = f'https://{account}.r2.cloudflarestorage.com'
+    return endpoint
+
+
+def client_from_env(bucket: str, endpoint: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY):
+    """
+    S3Client configured from R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY and
+    either R2_ENDPOINT or R2_ACCOUNT_ID (region from R2_REGION, default 'auto').
+    """
+    try:
+        credentials = Credentials(os.environ['R2_ACCESS_KEY_ID'], os.environ['R2_SECRET_ACCESS_KEY'],
+                                  os.environ.get('R2_REGION', 'auto'))
+    except KeyError as e:
+        raise ValueError(f'{e.args[0]} is not set')
+    return S3Client(endpoint_from_env(endpoint), bucket, credentials, max_connections=concurrency)
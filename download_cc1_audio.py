@@ -1,50 +1,63 @@
 #!/usr/bin/env python3
 """
 Download Google TTS audio for CC1 magazine paragraphs and vocabulary.
+
+Paragraphs are synthesized one sentence per request, in parallel, and
+stitched into public/audio/cc1/<key>.mp3. Each paragraph's sentence timings
+are written to public/data/cc1_audio_timing.json so the reading page can
+seek by sentence.
+
+Usage:
+    python3 download_cc1_audio.py
+    python3 download_cc1_audio.py --overwrite   # re-stitch paragraphs fetched in one piece
 """
 
-import os
+import argparse
+import asyncio
 import json
-import subprocess
-import time
-from urllib.parse import quote
+import os
+from dataclasses import replace
+from pathlib import Path
+from typing import Optional
+
+from audio_pipeline import AudioCache, FetchEngine, FetchJob, Utterance, print_summary, probe_file
+from audio_pipeline.chunker import timeline
+from audio_pipeline.engine import write_atomic
 
 AUDIO_DIR = "public/audio/cc1"
+TIMING_FILE = Path("public/data/cc1_audio_timing.json")
 
 
-def download_google_audio(text, filename):
-    """Download audio from Google Translate TTS"""
-    try:
-        encoded_text = quote(text)
-        url = f"https://translate.google.com/translate_tts?ie=UTF-8&tl=zh-CN&client=tw-ob&q={encoded_text}"
-
-        headers = [
-            '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            '-H', 'Referer: https://translate.google.com/',
-        ]
-
-        cmd = ['curl', '-s'] + headers + ['-o', filename, url]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-        if result.returncode == 0 and os.path.exists(filename):
-            size = os.path.getsize(filename)
-            if size < 100:
-                os.remove(filename)
-                return False
-            with open(filename, 'rb') as f:
-                header = f.read(4)
-                if header.startswith(b'<'):
-                    os.remove(filename)
-                    return False
-            return True
-        return False
-    except Exception as e:
-        print(f"  Error: {e}")
-        return False
+def write_timing(paragraphs: dict, provider: Optional[str] = None) -> list:
+    """
+    Write sentence timings for every stitched paragraph; returns keys without
+    timings. `provider` is the one the engine sent the sentences to, if it
+    overrode the utterances' own (FetchEngine.provider).
+    """
+    cache = AudioCache()
+    timing, missing = {}, []
+    for key, text in paragraphs.items():
+        path = Path(AUDIO_DIR) / f"{key}.mp3"
+        info = probe_file(path) if path.exists() else None
+        sentences = None
+        if info is not None and info.valid:
+            utterance = Utterance(text) if provider is None else replace(Utterance(text), provider=provider)
+            sentences = timeline(utterance, cache, expected_ms=info.duration_ms)
+        if sentences is None:
+            missing.append(key)
+        else:
+            timing[key] = sentences
+
+    write_atomic(TIMING_FILE, json.dumps({'version': 1, 'paragraphs': timing},
+                                         ensure_ascii=False, indent=1).encode('utf-8'))
+    return missing
 
 
 def main():
-    os.makedirs(AUDIO_DIR, exist_ok=True)
+    parser = argparse.ArgumentParser(description='Download CC1 paragraph and vocabulary audio')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Regenerate clips that already exist')
+    args = parser.parse_args()
 
     with open('cc1_audio_texts.json', 'r', encoding='utf-8') as f:
         data = json.load(f)
@@ -53,46 +66,25 @@ def main():
     vocab_words = data['vocab_words']
 
     # Build download list
-    items = []
+    jobs = []
     for key, text in paragraphs.items():
         filename = os.path.join(AUDIO_DIR, f"{key}.mp3")
-        items.append((filename, text, key))
-
-    seen = set()
-    for word in vocab_words:
-        if word not in seen:
-            seen.add(word)
-            filename = os.path.join(AUDIO_DIR, f"word_{word}.mp3")
-            items.append((filename, word, f"word_{word}"))
-
-    total = len(items)
-    print(f"Total audio files to generate: {total}")
+        jobs.append(FetchJob(Utterance(text), filename, label=key))
 
-    success = 0
-    skipped = 0
-    failed = 0
+    for word in dict.fromkeys(vocab_words):
+        filename = os.path.join(AUDIO_DIR, f"word_{word}.mp3")
+        jobs.append(FetchJob(Utterance(word), filename, label=f"word_{word}"))
 
-    for i, (filename, text, label) in enumerate(items, 1):
-        if os.path.exists(filename) and os.path.getsize(filename) > 100:
-            skipped += 1
-            continue
-
-        short = text[:40] + "..." if len(text) > 40 else text
-        print(f"[{i}/{total}] {short}")
-
-        if download_google_audio(text, filename):
-            success += 1
-        else:
-            failed += 1
-            print(f"  FAILED: {label}")
+    print(f"Total audio files to generate: {len(jobs)}")
 
-        time.sleep(0.4)
+    engine = FetchEngine(timeout=30, chunk=True, overwrite=args.overwrite)
+    print_summary(asyncio.run(engine.run(jobs)))
 
-    print(f"\n=== Summary ===")
-    print(f"Total: {total}")
-    print(f"Downloaded: {success}")
-    print(f"Skipped: {skipped}")
-    print(f"Failed: {failed}")
+    missing = write_timing(paragraphs, engine.provider)
+    print(f"\nSentence timings: {len(paragraphs) - len(missing)} paragraphs -> {TIMING_FILE}")
+    if missing:
+        print(f"No timings for {len(missing)} paragraphs (not stitched from cached sentences; "
+              f"rerun with --overwrite): {', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}")
 
 
 if __name__ == '__main__':
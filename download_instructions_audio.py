@@ -3,11 +3,7 @@
 Download Chinese audio for instruction terms using Google Translate TTS
 """
 
-import os
-import time
-from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.parse import quote
+from audio_pipeline import FetchJob, Utterance, print_summary, run_jobs
 
 # All instruction terms
 instruction_terms = [
@@ -49,59 +45,12 @@ instruction_terms = [
     "如果",
 ]
 
-def download_google_tts(word):
-    """Download audio from Google Translate"""
-    audio_dir = Path("audio")
-    audio_dir.mkdir(exist_ok=True)
-
-    filename = f"audio/{word}.mp3"
-
-    if os.path.exists(filename):
-        print(f"✓ {word} - already exists")
-        return filename
-
-    try:
-        # Google Translate TTS URL
-        url = f"https://translate.google.com/translate_tts?ie=UTF-8&q={quote(word)}&tl=zh-CN&client=tw-ob&ttsspeed=0.5"
-
-        print(f"⏳ {word}...", end=" ", flush=True)
-
-        req = Request(url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-        with urlopen(req, timeout=10) as response:
-            data = response.read()
-
-            if len(data) > 1000:  # Valid MP3 should be at least 1KB
-                with open(filename, 'wb') as f:
-                    f.write(data)
-                print(f"✓ ({len(data)} bytes)")
-                return filename
-            else:
-                print(f"✗ (invalid file size: {len(data)})")
-                return None
-
-    except Exception as e:
-        print(f"✗ ({str(e)[:50]})")
-        return None
-
 def main():
     print("Downloading audio for instruction terms...\n")
     print(f"Found {len(instruction_terms)} terms to download\n")
 
-    success = 0
-    failed = 0
-
-    for word in instruction_terms:
-        result = download_google_tts(word)
-        if result:
-            success += 1
-        else:
-            failed += 1
-        time.sleep(0.8)  # Rate limiting
-
-    print(f"\n✓ Done! Success: {success}, Failed: {failed}")
+    jobs = [FetchJob(Utterance(word, speed=0.5), f"audio/{word}.mp3") for word in instruction_terms]
+    print_summary(run_jobs(jobs, stretch=True))
 
 if __name__ == "__main__":
     main()
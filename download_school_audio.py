@@ -3,11 +3,7 @@
 Download Chinese audio for school tingxie sentences using Google Translate TTS
 """
 
-import os
-import time
-from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.parse import quote
+from audio_pipeline import FetchJob, Utterance, print_summary, run_jobs
 
 # School tingxie sentences and phrases
 SENTENCES = [
@@ -71,61 +67,17 @@ SENTENCES = [
     "这个问题太难了我们去问老师吧",
 ]
 
-def download_google_tts(text):
-    """Download audio from Google Translate"""
-    audio_dir = Path("audio")
-    audio_dir.mkdir(exist_ok=True)
-
-    # Remove punctuation for filename
-    clean_name = text.replace("，", "").replace("。", "").replace("！", "").replace("？", "").replace("、", "")
-    filename = f"audio/{clean_name}.mp3"
-
-    if os.path.exists(filename):
-        print(f"✓ {text[:20]}... - already exists")
-        return filename
-
-    try:
-        # Google Translate TTS URL
-        url = f"https://translate.google.com/translate_tts?ie=UTF-8&q={quote(text)}&tl=zh-CN&client=tw-ob&ttsspeed=0.5"
-
-        print(f"⏳ {text[:30]}...", end=" ", flush=True)
-
-        req = Request(url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-        with urlopen(req, timeout=15) as response:
-            data = response.read()
-
-            if len(data) > 1000:  # Valid MP3 should be at least 1KB
-                with open(filename, 'wb') as f:
-                    f.write(data)
-                print(f"✓ ({len(data)} bytes)")
-                return filename
-            else:
-                print(f"✗ (invalid file size: {len(data)})")
-                return None
-
-    except Exception as e:
-        print(f"✗ ({str(e)[:50]})")
-        return None
-
 def main():
     print("Downloading school tingxie sentence audio files from Google Translate...\n")
     print(f"Total sentences: {len(SENTENCES)}\n")
 
-    success = 0
-    failed = 0
-
+    jobs = []
     for text in SENTENCES:
-        result = download_google_tts(text)
-        if result:
-            success += 1
-        else:
-            failed += 1
-        time.sleep(1.0)  # Rate limiting - longer delay for longer sentences
+        # Remove punctuation for filename
+        clean_name = text.replace("，", "").replace("。", "").replace("！", "").replace("？", "").replace("、", "")
+        jobs.append(FetchJob(Utterance(text, speed=0.5), f"audio/{clean_name}.mp3"))
 
-    print(f"\n✓ Done! Success: {success}, Failed: {failed}")
+    print_summary(run_jobs(jobs, stretch=True))
 
 if __name__ == "__main__":
     main()
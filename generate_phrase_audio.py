@@ -3,11 +3,7 @@
 Download Chinese audio for phrase matching page using Google Translate TTS
 """
 
-import os
-import time
-from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.parse import quote
+from audio_pipeline import FetchJob, Utterance, print_summary, run_jobs
 
 PHRASES = [
     "很多颜色",
@@ -37,61 +33,11 @@ PHRASES = [
     "各种形状"
 ]
 
-def download_google_tts(phrase):
-    """Download audio from Google Translate"""
-    audio_dir = Path("audio")
-    audio_dir.mkdir(exist_ok=True)
-
-    filename = f"audio/{phrase}.mp3"
-
-    if os.path.exists(filename):
-        print(f"✓ {phrase} - already exists")
-        return filename
-
-    try:
-        # Google Translate TTS URL
-        url = f"https://translate.google.com/translate_tts?ie=UTF-8&q={quote(phrase)}&tl=zh-CN&client=tw-ob&ttsspeed=0.5"
-
-        print(f"⏳ {phrase}...", end=" ", flush=True)
-
-        req = Request(url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-        with urlopen(req, timeout=10) as response:
-            data = response.read()
-
-            if len(data) > 1000:  # Valid MP3 should be at least 1KB
-                with open(filename, 'wb') as f:
-                    f.write(data)
-                print(f"✓ ({len(data)} bytes)")
-                return filename
-            else:
-                print(f"✗ (invalid file size: {len(data)})")
-                return None
-
-    except Exception as e:
-        print(f"✗ ({str(e)[:50]})")
-        return None
-
 def main():
     print("Downloading phrase audio files from Google Translate...\n")
 
-    success_count = 0
-    failed = []
-
-    for phrase in PHRASES:
-        result = download_google_tts(phrase)
-        if result:
-            success_count += 1
-        else:
-            failed.append(phrase)
-        time.sleep(0.8)  # Rate limiting
-
-    print(f"\n✓ Done! Successfully downloaded {success_count}/{len(PHRASES)} files")
-
-    if failed:
-        print(f"\n✗ Failed phrases: {', '.join(failed)}")
+    jobs = [FetchJob(Utterance(phrase, speed=0.5), f"audio/{phrase}.mp3") for phrase in PHRASES]
+    print_summary(run_jobs(jobs, stretch=True))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Refresh the audio file index used by the download scripts.
+
+The download scripts trust .audio_cache/index.sqlite3 to know which clips are
+already on disk. Run this after adding, editing or deleting MP3s by hand so
+the index matches the filesystem again. Only files whose size or mtime
+changed since the last refresh are hashed and validated again.
+
+Usage:
+    python scripts/audio_index.py
+    python scripts/audio_index.py public/audio/cc1
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.paths import AUDIO_DIRS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the audio file index')
+    parser.add_argument('dirs', nargs='*', help='Directories to rescan (default: all audio dirs)')
+    args = parser.parse_args()
+
+    index = AudioIndex()
+    stats = index.refresh(args.dirs or AUDIO_DIRS)
+    summary = index.summary()
+    index.close()
+
+    print(f"Checked: {stats['checked']}")
+    print(f"Removed: {stats['removed']}")
+    print(f"Directories with no files added or removed: {stats['unchanged_dirs']}")
+    print(f"Indexed: {summary.get('valid', 0)} valid, {summary.get('invalid', 0)} invalid")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fetch engine against a local stand-in for the TTS services.
+
+Starts audio_pipeline.fake_server on 127.0.0.1, points the google and
+ttsmp3 providers at it and runs the same set of jobs through a fresh engine
+(empty cache, no audio index) at each concurrency level. Reports clips per
+second, p50/p99 request latency and retry amplification: provider requests
+per clip (1 for google, 2 for ttsmp3 when nothing fails) and job attempts
+per clip. Nothing is written outside a temporary directory.
+
+Usage:
+    python scripts/bench_fetch.py
+    python scripts/bench_fetch.py --concurrency 1 8 32 --jobs 1000 --latency 0.1
+    python scripts/bench_fetch.py --provider ttsmp3 --error-rate 0.05 --throttle-rate 0.02
+    python scripts/bench_fetch.py --server-rate 40 --json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.cache import AudioCache
+from audio_pipeline.engine import FetchEngine, FetchJob
+from audio_pipeline.fake_server import FakeTTSServer, ServerBehavior, point_providers_at
+from audio_pipeline.flight import Flights
+from audio_pipeline.limiter import RateStore
+from audio_pipeline.metrics import Metrics
+from audio_pipeline.providers import FailoverProvider, Utterance, register_provider
+
+
+class SampledMetrics(Metrics):
+    """Engine metrics that also keep every request's duration, for exact percentiles."""
+
+    def __init__(self, directory: Path):
+        super().__init__()
+        self.directory = directory
+        self.samples = []
+
+    def record_request(self, host: str, queue: float, total: float, response):
+        super().record_request(host, queue, total, response)
+        self.samples.append(total)
+
+    def write(self, run: str = '', directory: Path = None) -> Path:
+        return super().write(run or 'bench', self.directory)
+
+
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench(concurrency: int, args, behavior: ServerBehavior) -> dict:
+    with tempfile.TemporaryDirectory() as tmp, FakeTTSServer(behavior) as server:
+        tmp = Path(tmp)
+        point_providers_at(server.url)
+        register_provider(FailoverProvider())
+        metrics = SampledMetrics(tmp / 'metrics')
+        engine = FetchEngine(
+            concurrency=concurrency, host_rates={'127.0.0.1': args.rate}, retries=args.retries,
+            cache=AudioCache(tmp / 'cache'), index=False, metrics=metrics,
+            rates=False if args.fixed_rate else RateStore(tmp / 'rates.json'),
+            flights=Flights(tmp / 'flights'), provider=args.provider, on_result=lambda *_: None)
+        jobs = [FetchJob(Utterance(f'基准{i}', speed=args.speed), tmp / 'out' / f'{i}.mp3', label=str(i))
+                for i in range(args.jobs)]
+        start = time.perf_counter()
+        try:
+            results = asyncio.run(engine.run(jobs))
+        finally:
+            point_providers_at(None)
+        elapsed = time.perf_counter() - start
+
+    clips = sum(1 for r in results if r.status != 'failed')
+    return {
+        'concurrency': concurrency,
+        'jobs': len(jobs),
+        'clips': clips,
+        'failed': len(results) - clips,
+        'seconds': round(elapsed, 3),
+        'clips_per_second': round(clips / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(metrics.samples, 0.5) * 1000, 1),
+        'p99_ms': round(percentile(metrics.samples, 0.99) * 1000, 1),
+        'requests_per_clip': round(server.requests / clips, 3) if clips else None,
+        'attempts_per_clip': round(sum(r.attempts for r in results) / clips, 3) if clips else None,
+        'statuses': {str(status): count for status, count in sorted(server.statuses.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fetch engine against a local fake TTS server')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help='Concurrency levels to run (default: 1 4 16 64)')
+    parser.add_argument('--jobs', type=int, default=300, help='Distinct clips per level (default: 300)')
+    parser.add_argument('--provider', choices=['google', 'ttsmp3', 'auto'], default='google')
+    parser.add_argument('--speed', type=float, default=1.0, help='Utterance speed (default: 1.0)')
+    parser.add_argument('--retries', type=int, default=2, help='Retries per job (default: 2)')
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help="Client-side starting rate for the server's host, requests/s (default: 1000)")
+    parser.add_argument('--fixed-rate', action='store_true', help='Keep the client rate fixed instead of adapting it')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mean server latency in seconds (default: 0.05)')
+    parser.add_argument('--jitter', type=float, default=0.5, help='Latency spread as a fraction (default: 0.5)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of HTTP 500s (default: 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Fraction of HTML throttle pages (default: 0)')
+    parser.add_argument('--server-rate', type=float, default=None,
+                        help='Requests/s the server accepts before answering 429 (default: unlimited)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the server\'s randomness (default: 1)')
+    parser.add_argument('--json', type=Path, help='Also write the results to this file')
+    args = parser.parse_args()
+
+    rows = []
+    for concurrency in args.concurrency:
+        behavior = ServerBehavior(args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                                  args.server_rate, args.seed)
+        print(f"Concurrency {concurrency}: {args.jobs} jobs via {args.provider}")
+        rows.append(bench(concurrency, args, behavior))
+
+    print(f"\n=== Summary ===")
+    print(f"{'conc':>5} {'clips/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'req/clip':>9} {'att/clip':>9} {'failed':>7}")
+    for row in rows:
+        print(f"{row['concurrency']:>5} {row['clips_per_second']:>9.1f} {row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+              f"{row['requests_per_clip'] or 0:>9.3f} {row['attempts_per_clip'] or 0:>9.3f} {row['failed']:>7}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'settings': {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+                       'results': rows}, f, indent=1)
+        print(f"Results: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
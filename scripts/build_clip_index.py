@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Build the clip index: duration, peak and leading silence for every clip.
+
+Measures all clips on a process pool (only those new or changed since the
+last build) and writes public/data/audio_index.json for the served ones.
+The video generator and sprite packer read it instead of probing files.
+Duration needs nothing extra; peak and leading silence need ffmpeg.
+
+Usage:
+    python scripts/build_clip_index.py
+    python scripts/build_clip_index.py --workers 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.clipinfo import INDEX_PATH, build_clip_index
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.paths import AUDIO_DIRS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the clip duration/peak/lead index')
+    parser.add_argument('dirs', nargs='*', help='Directories to measure (default: all audio dirs)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    def on_error(path, error):
+        print(f"✗ {path}: {error}")
+
+    index = AudioIndex()
+    start = time.time()
+    stats = build_clip_index(args.dirs or AUDIO_DIRS, workers=args.workers, index=index, on_error=on_error)
+    index.close()
+
+    print(f"\n=== Summary ({time.time() - start:.1f}s) ===")
+    print(f"Measured: {stats['measured']}")
+    print(f"From cache: {stats['cached']}")
+    print(f"Failed: {stats['failed']}")
+    print(f"Wrote {INDEX_PATH.relative_to(ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
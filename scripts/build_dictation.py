@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Render each dictation row as one paced audio track.
+
+For every vocabulary row, reads each word twice (--repeats) with a pause
+between readings and writing time after them, and writes
+public/audio-dictation/<dataset>/row-<n>.mp3 plus a cue index
+public/audio-dictation/<dataset>.json saying when each word is read and
+when to reveal it. Rows render on a process pool; tracks whose clips and
+pacing haven't changed are left alone.
+
+Usage:
+    python scripts/build_dictation.py
+    python scripts/build_dictation.py tingxie --repeats 3 --word-gap 6000
+    python scripts/build_dictation.py --force --workers 4
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.dictation import Pacing, Track, build_tracks
+from audio_pipeline.planner import audio_refs
+
+DATA_DIR = ROOT / 'public' / 'data'
+
+
+def rows(path):
+    """One track per vocabulary row, each clip once, in reading order."""
+    with open(DATA_DIR / path, 'r', encoding='utf-8') as f:
+        vocabulary = json.load(f)['vocabulary']
+    return [Track(f"row-{row['row']}", list(dict.fromkeys((text, audio) for text, audio, _ in audio_refs(row))))
+            for row in vocabulary]
+
+
+DATASETS = {
+    'tingxie': lambda: rows('tingxie/tingxie_vocabulary.json'),
+    'school': lambda: rows('tingxie/school_vocabulary.json'),
+}
+
+
+def main():
+    defaults = Pacing()
+    parser = argparse.ArgumentParser(description='Render vocabulary rows as paced dictation tracks')
+    parser.add_argument('datasets', nargs='*', metavar='dataset',
+                        help=f"Datasets to render (default: all of {', '.join(DATASETS)})")
+    parser.add_argument('--repeats', type=int, default=defaults.repeats,
+                        help=f'Readings per word (default: {defaults.repeats})')
+    parser.add_argument('--repeat-gap', type=int, default=defaults.repeat_gap_ms, metavar='MS',
+                        help=f'Pause between readings (default: {defaults.repeat_gap_ms})')
+    parser.add_argument('--word-gap', type=int, default=defaults.word_gap_ms, metavar='MS',
+                        help=f'Writing time after a word (default: {defaults.word_gap_ms})')
+    parser.add_argument('--per-char', type=int, default=defaults.per_char_ms, metavar='MS',
+                        help=f'Extra writing time per character (default: {defaults.per_char_ms})')
+    parser.add_argument('--lead', type=int, default=defaults.lead_ms, metavar='MS',
+                        help=f'Silence before the first word (default: {defaults.lead_ms})')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-render tracks that are up to date')
+    args = parser.parse_args()
+    unknown = [d for d in args.datasets if d not in DATASETS]
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)}")
+    if args.repeats < 1:
+        parser.error('--repeats must be at least 1')
+    pacing = Pacing(args.repeats, args.repeat_gap, args.word_gap, args.per_char, args.lead)
+
+    def on_track(track, error):
+        if error:
+            print(f"  ✗ {track.name}: {error}")
+
+    for dataset in args.datasets or DATASETS:
+        tracks = DATASETS[dataset]()
+        stats = build_tracks(dataset, tracks, pacing, workers=args.workers, force=args.force, on_track=on_track)
+        print(f"{dataset}: {stats['built']} built, {stats['current']} up to date, "
+              f"{stats['failed']} failed, {stats['missing']} clips missing")
+        for track in tracks:
+            for audio in track.missing:
+                print(f"  missing {audio} ({track.name})")
+
+
+if __name__ == '__main__':
+    main()
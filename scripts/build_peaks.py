@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Precompute waveform peaks for every long recording.
+
+Finds the recordings in the audio directories (reading passages, koushi
+lessons; not word clips), decodes each once and writes its min/max peaks
+next to it as <file>.dat in audiowaveform's 8-bit binary format, so pages
+can draw a waveform without decoding the recording. Recordings whose .dat
+is current are left alone. Needs ffmpeg.
+
+Usage:
+    python scripts/build_peaks.py
+    python scripts/build_peaks.py public/audio/koushi --pixels-per-second 50
+    python scripts/build_peaks.py public/audio/11_P3HCL.mp3 --force
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.paths import AUDIO_DIRS
+from audio_pipeline.peaks import PIXELS_PER_SECOND, build_peaks, find_recordings, peaks_path
+
+
+def display(path) -> str:
+    path = Path(path)
+    return str(path.relative_to(ROOT)) if path.is_relative_to(ROOT) else str(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute waveform peaks for long recordings')
+    parser.add_argument('paths', nargs='*', help='Recordings or directories to scan (default: all audio dirs)')
+    parser.add_argument('--pixels-per-second', type=int, default=PIXELS_PER_SECOND,
+                        help=f'Peak pairs per second of audio (default: {PIXELS_PER_SECOND})')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rebuild peaks that are up to date')
+    args = parser.parse_args()
+
+    start = time.time()
+    recordings = find_recordings([Path(p).resolve() for p in args.paths] or AUDIO_DIRS)
+
+    def on_result(path, size, duration_ms, error):
+        if error:
+            print(f"  ✗ {display(path)}: {error}")
+        else:
+            print(f"  ✓ {display(peaks_path(path))} ({duration_ms / 1000:.1f}s, {size / 1024:.1f} KB)")
+
+    stats = build_peaks(recordings, args.pixels_per_second, workers=args.workers, force=args.force,
+                        on_result=on_result)
+    print(f"\n=== Summary ===")
+    print(f"Recordings: {len(recordings)} in {time.time() - start:.1f}s")
+    print(f"Built: {stats['built']}")
+    print(f"Up to date: {stats['current']}")
+    print(f"Failed: {stats['failed']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Build compact Opus/AAC renditions of public/audio for the web player.
+
+Transcodes every MP3 under public/audio to mono Opus (20 kbps) and AAC
+(32 kbps) in public/audio-renditions/, on a process pool, and writes the
+rendition map that src/hooks/useAudioPlayer.ts reads. Only clips that are
+new or changed since the last run are transcoded. Needs ffmpeg built with
+libopus.
+
+Usage:
+    python scripts/build_renditions.py
+    python scripts/build_renditions.py public/audio/cc1 --workers 4
+    python scripts/build_renditions.py --force
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.renditions import RENDITIONS, SOURCE_DIR, build_renditions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build Opus/AAC renditions of public/audio')
+    parser.add_argument('dirs', nargs='*', help='Directories under public/audio (default: all of it)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rebuild renditions that are up to date')
+    args = parser.parse_args()
+
+    def on_result(source, name, size, error):
+        if error:
+            print(f"✗ {source} ({name}): {error}")
+
+    start = time.time()
+    stats = build_renditions(args.dirs or [SOURCE_DIR], workers=args.workers,
+                             force=args.force, on_result=on_result)
+
+    mb = 1024 * 1024
+    print(f"\n=== Summary ({time.time() - start:.1f}s) ===")
+    print(f"Built: {stats['built']}")
+    print(f"Up to date: {stats['current']}")
+    print(f"Failed: {stats['failed']}")
+    print(f"MP3: {stats['source_bytes'] / mb:.1f} MB")
+    for r in RENDITIONS:
+        size = stats[f'{r.name}_bytes']
+        share = size / stats['source_bytes'] * 100 if stats['source_bytes'] else 0
+        print(f"{r.name}: {size / mb:.1f} MB ({share:.0f}% of MP3)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Pack each vocabulary row or lesson into one audio sprite.
+
+Writes public/audio-sprites/<dataset>/<group>.mp3 plus an offset/duration
+index public/audio-sprites/<dataset>.json, keyed by the clip paths used in
+the data files, so a practice session needs one audio request instead of one
+per word. Sprites whose clips haven't changed are left alone.
+
+Usage:
+    python scripts/build_sprites.py
+    python scripts/build_sprites.py tingxie curriculum
+    python scripts/build_sprites.py --force
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.sprites import Sprite, build_sprites, collect_audio
+
+DATA_DIR = ROOT / 'public' / 'data'
+
+
+def load(path):
+    with open(DATA_DIR / path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rows(path):
+    """One sprite per vocabulary row."""
+    return [Sprite(f"row-{row['row']}", collect_audio(row)) for row in load(path)['vocabulary']]
+
+
+def curriculum():
+    levels = load('curriculum_p1_p3.json')['levels']
+    return [Sprite(f"{level}-row-{row['row']}", collect_audio(row))
+            for level, data in levels.items() for row in data['rows']]
+
+
+def whole(name, path):
+    """A single sprite for the whole file."""
+    return lambda: [Sprite(name, collect_audio(load(path)))]
+
+
+DATASETS = {
+    'tingxie': lambda: rows('tingxie/tingxie_vocabulary.json'),
+    'school': lambda: rows('tingxie/school_vocabulary.json'),
+    'curriculum': curriculum,
+    'collocations': whole('all', 'tingxie/word_collocations.json'),
+    'radicals': whole('all', 'radicals/radicals.json'),
+    'lesson2': whole('all', 'lessons/lesson2.json'),
+    'p3hcl-reading': lambda: [Sprite(path.stem.replace('_words', ''), collect_audio(load(path.name)))
+                              for path in sorted(DATA_DIR.glob('p3hcl_reading_*_words.json'))],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack vocabulary rows and lessons into audio sprites')
+    parser.add_argument('datasets', nargs='*', metavar='dataset',
+                        help=f"Datasets to pack (default: all of {', '.join(DATASETS)})")
+    parser.add_argument('--force', action='store_true', help='Rebuild sprites that are up to date')
+    args = parser.parse_args()
+    unknown = [d for d in args.datasets if d not in DATASETS]
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)}")
+
+    def on_sprite(sprite, error):
+        if error:
+            print(f"  ✗ {sprite.name}: {error}")
+
+    for dataset in args.datasets or DATASETS:
+        sprites = DATASETS[dataset]()
+        stats = build_sprites(dataset, sprites, force=args.force, on_sprite=on_sprite)
+        print(f"{dataset}: {stats['built']} built, {stats['current']} up to date, "
+              f"{stats['failed']} failed, {stats['missing']} clips missing")
+        for sprite in sprites:
+            for audio in sprite.missing:
+                print(f"  missing {audio} ({sprite.name})")
+
+
+if __name__ == '__main__':
+    main()
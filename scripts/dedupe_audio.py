@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Find duplicate clips across the audio directories.
+
+Groups byte-identical clips by hash and near-identical ones (same word,
+different bytes) by a decoded-PCM fingerprint, picks one canonical copy
+under public/ for each group, and can rewrite the `audio` fields in
+public/data to point at it and delete the served copies nothing uses
+any more. The similar-clip pass needs ffmpeg; skip it with --exact.
+
+Usage:
+    python scripts/dedupe_audio.py                  # report only
+    python scripts/dedupe_audio.py --rewrite        # point data files at canonical copies
+    python scripts/dedupe_audio.py --rewrite --prune
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.dedupe import (
+    canonical_map,
+    find_duplicates,
+    referenced_clips,
+    removable_copies,
+    rewrite_data,
+)
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.paths import AUDIO_DIRS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find and remove duplicate audio clips')
+    parser.add_argument('dirs', nargs='*', help='Directories to scan (default: all audio dirs)')
+    parser.add_argument('--exact', action='store_true', help='Only group byte-identical clips (no ffmpeg)')
+    parser.add_argument('--rewrite', action='store_true', help='Rewrite data JSON audio fields to canonical copies')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete served copies no data file or page references (needs --rewrite)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for fingerprinting')
+    parser.add_argument('--verbose', '-v', action='store_true', help='List every group')
+    args = parser.parse_args()
+    if args.prune and not args.rewrite:
+        parser.error('--prune needs --rewrite')
+
+    index = AudioIndex()
+    groups = find_duplicates(args.dirs or AUDIO_DIRS, index=index, similar=not args.exact,
+                             workers=args.workers)
+
+    for kind in ('identical', 'similar'):
+        subset = [g for g in groups if g.kind == kind]
+        copies = sum(len(g.copies) for g in subset)
+        wasted = sum(g.wasted_bytes() for g in subset)
+        print(f"{kind.capitalize()}: {len(subset)} groups, {copies} extra copies, {wasted / 1024 / 1024:.1f} MB")
+        if args.verbose:
+            for group in subset:
+                print(f"  {group.canonical}")
+                for copy in group.copies:
+                    print(f"    = {copy}")
+
+    mapping = canonical_map(groups)
+    changed = rewrite_data(mapping, dry_run=not args.rewrite)
+    verb = 'Rewrote' if args.rewrite else 'Would rewrite'
+    print(f"\n{verb} {sum(changed.values())} audio fields in {len(changed)} data files")
+    for path, count in changed.items():
+        print(f"  {path}: {count}")
+
+    removable = removable_copies(groups, referenced_clips())
+    if args.prune:
+        for path in removable:
+            (ROOT / path).unlink()
+            index.forget(ROOT / path)
+        print(f"Deleted {len(removable)} unreferenced served copies")
+    else:
+        print(f"{len(removable)} served copies are unreferenced and could be pruned (--rewrite --prune)")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
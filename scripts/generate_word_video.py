@@ -19,6 +19,7 @@ import math
 import os
 import random
 import subprocess
+import sys
 import tempfile
 from dataclasses import dataclass
 from pathlib import Path
@@ -27,6 +28,11 @@ from typing import Callable, Optional
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio_pipeline.clipinfo import clip_info
+from audio_pipeline.mp3 import probe_file
+
 # Video settings
 WIDTH = 1920
 HEIGHT = 1080
@@ -1305,14 +1311,13 @@ class VideoGenerator:
                 print(f"Warning: Audio file not found: {word_audio}")
                 return None
 
-            # Get duration of the word audio
-            result = subprocess.run([
-                'ffprobe', '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                word_audio
-            ], capture_output=True, text=True)
-            word_duration = float(result.stdout.strip()) if result.stdout.strip() else 1.0
+            # Get duration of the word audio from the clip index, else its MP3 frames
+            indexed = clip_info(word_audio)
+            if indexed is not None:
+                word_duration = indexed.duration_ms / 1000
+            else:
+                info = probe_file(word_audio)
+                word_duration = info.duration if info.valid else 1.0
 
             # Calculate silence duration (word plays at ~3.5 seconds, near end of video)
             silence_before = max(0, DURATION - 0.5 - word_duration)
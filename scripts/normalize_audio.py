@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Trim silence and normalize loudness of every word clip, in place.
+
+Decodes each MP3, trims leading/trailing silence, brings speech to a common
+loudness (-20 dBFS RMS, peaks below -1 dBFS) and re-encodes at 48 kbps, on a
+process pool. Results are cached by source hash, so a rerun only processes
+clips that are new since the last one. Recordings and audio with timing
+data (CC1 paragraphs, reading passages) are left alone unless --all is
+given. Needs ffmpeg and NumPy.
+
+Usage:
+    python scripts/normalize_audio.py
+    python scripts/normalize_audio.py public/audio/cc1 --workers 4
+    python scripts/normalize_audio.py --dry-run
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.normalize import normalize_tree
+from audio_pipeline.paths import AUDIO_DIRS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trim silence and normalize loudness of MP3 clips')
+    parser.add_argument('dirs', nargs='*', help='Directories to process (default: all audio dirs)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Print gain and trim for every clip')
+    parser.add_argument('--all', action='store_true',
+                        help='Also process recordings and audio that timing data refers to (shifts their timings)')
+    args = parser.parse_args()
+
+    def on_result(path, stats, error):
+        if error:
+            print(f"✗ {path}: {error}")
+        elif args.verbose:
+            print(f"  {path}: {stats['gain_db']:+.1f} dB, trimmed {stats['trimmed_ms']} ms")
+
+    index = AudioIndex()
+    start = time.time()
+    stats = normalize_tree(args.dirs or AUDIO_DIRS, workers=args.workers, index=index,
+                           dry_run=args.dry_run, on_result=on_result, everything=args.all)
+    index.close()
+
+    print(f"\n=== Summary ({time.time() - start:.1f}s) ===")
+    print(f"Processed: {stats['processed']}")
+    print(f"Restored from cache: {stats['reused']}")
+    print(f"Already normalized: {stats['skipped'] + stats['unchanged']}")
+    print(f"Failed: {stats['failed']}")
+    print(f"Left alone (recordings, timed audio): {stats['excluded']}")
+    if args.dry_run:
+        print("(dry run: nothing written)")
+
+
+if __name__ == '__main__':
+    main()
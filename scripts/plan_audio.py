@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Plan (and optionally fetch) every missing or invalid clip across all datasets.
+
+Loads every vocabulary dataset the site serves, works out the deduplicated
+set of public/audio clips that are missing or fail validation, and writes a
+work plan to .audio_cache/plan.json. With --run the fetch engine executes
+the plan straight away; --execute runs a plan written earlier. Words that
+are spoken in a school sentence, CC1 paragraph or P3HCL reading recording
+are cut out of it rather than fetched (--no-slice to always fetch).
+
+Usage:
+    python scripts/plan_audio.py
+    python scripts/plan_audio.py tingxie curriculum -v
+    python scripts/plan_audio.py --run --batch
+    python scripts/plan_audio.py --execute .audio_cache/plan.json
+"""
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline import print_summary, run_jobs
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.planner import DATASETS, PLAN_PATH, collect_needs, load_plan, missing_needs, write_plan
+
+
+def execute(plan: Path, batch: bool, slicer: bool):
+    jobs = load_plan(plan)
+    print(f"Executing {len(jobs)} jobs from {plan}")
+    if jobs:
+        print_summary(run_jobs(jobs, batch=batch, journal='plan', stretch=True, chunk=True, slicer=slicer))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan missing audio across every dataset')
+    parser.add_argument('datasets', nargs='*', metavar='dataset',
+                        help=f"Datasets to plan (default: all of {', '.join(DATASETS)})")
+    parser.add_argument('--plan', type=Path, default=PLAN_PATH, help=f'Plan file (default: {PLAN_PATH})')
+    parser.add_argument('--run', action='store_true', help='Fetch the planned clips after writing the plan')
+    parser.add_argument('--execute', type=Path, metavar='PLAN', help='Fetch the clips of an existing plan')
+    parser.add_argument('--batch', action='store_true',
+                        help='Synthesize each vocabulary row in one request when fetching')
+    parser.add_argument('--no-slice', action='store_true',
+                        help="Fetch every word instead of cutting it from sentence recordings")
+    parser.add_argument('-v', '--verbose', action='store_true', help='List planned clips and conflicts')
+    args = parser.parse_args()
+    unknown = [d for d in args.datasets if d not in DATASETS]
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)}")
+
+    if args.execute:
+        execute(args.execute, args.batch, not args.no_slice)
+        return
+
+    needs, conflicts = collect_needs(args.datasets)
+    index = AudioIndex()
+    try:
+        todo = missing_needs(needs, index)
+    finally:
+        index.close()
+    write_plan(todo, args.plan, conflicts)
+
+    by_dataset = Counter(need.datasets[0] for need, _ in todo)
+    by_reason = Counter(reason for _, reason in todo)
+    print(f"\n=== Plan ===")
+    print(f"Clips needed: {len(needs)}")
+    print(f"To fetch: {len(todo)}" + (f" ({', '.join(f'{n} {r}' for r, n in by_reason.items())})" if todo else ''))
+    for dataset, count in by_dataset.most_common():
+        print(f"  {dataset}: {count}")
+    print(f"Conflicting settings: {len(conflicts)} (kept the first dataset's)")
+    print(f"Plan: {args.plan}")
+    if args.verbose:
+        for need, reason in todo:
+            print(f"  {reason:8} {need.audio} '{need.utterance.text}' ({', '.join(need.datasets)})")
+        for audio, kept, dropped in conflicts:
+            print(f"  conflict {audio}: {kept} over {dropped}")
+
+    if args.run:
+        print()
+        execute(args.plan, args.batch, not args.no_slice)
+
+
+if __name__ == '__main__':
+    main()
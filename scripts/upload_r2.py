@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Upload audio to the R2 bucket, skipping objects that haven't changed.
+
+Diffs local files against .audio_cache/uploads/<host>-<bucket>.json and uploads
+only new or changed ones, concurrently and over pooled connections, with
+the right Content-Type and Cache-Control. Large files use multipart uploads.
+Replaces the one-wrangler-call-per-file loop in upload_audio.sh.
+
+Credentials come from the environment:
+    R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY
+    R2_ACCOUNT_ID (or R2_ENDPOINT for any S3-compatible endpoint)
+
+Usage:
+    python scripts/upload_r2.py                       # audio/ -> tingxie-assets/audio/...
+    python scripts/upload_r2.py public/audio-renditions --base public
+    python scripts/upload_r2.py --dry-run
+    python scripts/upload_r2.py --endpoint http://127.0.0.1:9000   # local MinIO
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.upload import (
+    DEFAULT_CONCURRENCY, UploadManifest, client_from_env, endpoint_from_env, scan, sync,
+)
+
+DEFAULT_BUCKET = 'tingxie-assets'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload changed audio files to R2')
+    parser.add_argument('dirs', nargs='*', help='Directories to upload (default: audio)')
+    parser.add_argument('--bucket', default=DEFAULT_BUCKET, help=f'Bucket name (default: {DEFAULT_BUCKET})')
+    parser.add_argument('--base', default=str(ROOT),
+                        help='Object keys are paths relative to this directory (default: repo root)')
+    parser.add_argument('--prefix', default='', help='Prepended to every object key')
+    parser.add_argument('--endpoint', help='S3 endpoint URL (default: from R2_ENDPOINT / R2_ACCOUNT_ID)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Parallel requests')
+    parser.add_argument('--force', action='store_true', help='Upload everything, ignoring the manifest')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be uploaded')
+    args = parser.parse_args()
+
+    index = AudioIndex()
+    items = scan(args.dirs or [ROOT / 'audio'], Path(args.base), args.prefix, index=index)
+    index.close()
+    try:
+        manifest = UploadManifest(args.bucket, endpoint_from_env(args.endpoint))
+    except ValueError as e:
+        parser.error(str(e))
+
+    client = None
+    if not args.dry_run:
+        try:
+            client = client_from_env(args.bucket, args.endpoint, args.concurrency)
+        except ValueError as e:
+            parser.error(str(e))
+
+    total = 0
+
+    def on_result(result):
+        nonlocal total
+        total += 1
+        if result.status == 'failed':
+            print(f"\n✗ {result.item.key}: {result.error}")
+        else:
+            print(f"[{total}/{len(pending)}] {result.item.key}".ljust(60), end='\r', flush=True)
+
+    pending = [item for item in items if args.force or not manifest.is_current(item)]
+    print(f"{len(items)} files, {len(pending)} new or changed")
+    if args.dry_run:
+        for item in pending:
+            print(f"  {item.key} ({item.size} bytes)")
+        return
+
+    start = time.time()
+    _, results = sync(client, items, manifest, force=args.force,
+                      concurrency=args.concurrency, on_result=on_result)
+    failed = [r for r in results if r.status == 'failed']
+    sent = sum(r.item.size for r in results if r.status == 'uploaded')
+    print(f"\n\n=== Summary ({time.time() - start:.1f}s) ===")
+    print(f"Uploaded: {len(results) - len(failed)} ({sent / 1024 / 1024:.1f} MB)")
+    print(f"Unchanged: {len(items) - len(pending)}")
+    print(f"Failed: {len(failed)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
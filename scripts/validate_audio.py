@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Validate every MP3 in the audio directories by walking its frame chain.
+
+Reports files that are truncated, are HTML error pages saved as .mp3, or
+have a broken frame chain, plus total duration. Runs across a process pool.
+
+Usage:
+    python scripts/validate_audio.py
+    python scripts/validate_audio.py public/audio/cc1 --workers 4
+    python scripts/validate_audio.py --update-index
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from audio_pipeline.index import AudioIndex
+from audio_pipeline.mp3 import probe_tree
+from audio_pipeline.paths import AUDIO_DIRS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate MP3 frame chains')
+    parser.add_argument('dirs', nargs='*', help='Directories to scan (default: all audio dirs)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--update-index', action='store_true',
+                        help='Record invalid files in the audio index so the next download run refetches them')
+    args = parser.parse_args()
+
+    start = time.time()
+    results = probe_tree(args.dirs or AUDIO_DIRS, workers=args.workers)
+    elapsed = time.time() - start
+
+    invalid = {path: info for path, info in results.items() if not info.valid}
+    for path, info in sorted(invalid.items()):
+        print(f"✗ {Path(path).relative_to(ROOT) if path.startswith(str(ROOT)) else path}: {info.error}")
+
+    total_duration = sum(info.duration for info in results.values() if info.valid)
+    print(f"\n=== Summary ===")
+    print(f"Files: {len(results)} in {elapsed:.1f}s")
+    print(f"Valid: {len(results) - len(invalid)}")
+    print(f"Invalid: {len(invalid)} ({sum(1 for i in invalid.values() if i.truncated)} truncated)")
+    print(f"Total duration: {total_duration / 60:.1f} min")
+
+    if args.update_index and invalid:
+        index = AudioIndex()
+        for path in invalid:
+            index.check(path)
+        index.close()
+        print(f"Marked {len(invalid)} files invalid in the audio index")
+
+
+if __name__ == '__main__':
+    main()
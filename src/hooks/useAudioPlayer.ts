@@ -1,14 +1,33 @@
-import { useRef, useCallback } from 'react'
+import { useRef, useCallback, useEffect } from 'react'
 import { ERRORS } from '@/lib/constants'
+import { loadRenditions, resolveAudioSource } from '@/lib/audioRenditions'
 
 interface AudioCache {
   [key: string]: HTMLAudioElement
 }
 
+// Determine the MIME type of an MP3/WAV/AIFF by inspecting its first bytes
+function sniffMimeType(view: Uint8Array): string {
+  // Check for RIFF header (WAV files start with 0x52, 0x49, 0x46, 0x46 = "RIFF")
+  if (view[0] === 0x52 && view[1] === 0x49 && view[2] === 0x46 && view[3] === 0x46) {
+    return 'audio/wav'
+  }
+  // Check for FORM header (AIFF files)
+  if (view[0] === 0x46 && view[1] === 0x4f && view[2] === 0x52 && view[3] === 0x4d) {
+    return 'audio/x-aiff'
+  }
+  return 'audio/mpeg' // default to MP3
+}
+
 export function useAudioPlayer() {
   const audioCache = useRef<AudioCache>({})
   const currentAudio = useRef<HTMLAudioElement | null>(null)
 
+  // Warm the rendition map so the first play doesn't wait on it
+  useEffect(() => {
+    loadRenditions()
+  }, [])
+
   const stop = useCallback(() => {
     if (currentAudio.current) {
       currentAudio.current.pause()
@@ -40,8 +59,16 @@ export function useAudioPlayer() {
       let audio = audioCache.current[audioPath]
 
       if (!audio) {
-        // Fetch audio first to verify it loads
-        const response = await fetch(absolutePath)
+        // Prefer the compact Opus/AAC rendition when one exists
+        const source = await resolveAudioSource(absolutePath)
+
+        // Fetch audio first to verify it loads, falling back to the MP3
+        let response = await fetch(source.url)
+        let mimeType = source.mimeType
+        if (!response.ok && source.url !== absolutePath) {
+          response = await fetch(absolutePath)
+          mimeType = undefined
+        }
         if (!response.ok) {
           throw new Error(`Failed to fetch audio: ${response.status} ${response.statusText}`)
         }
@@ -49,18 +76,8 @@ export function useAudioPlayer() {
         // Create audio blob from response
         const blob = await response.blob()
 
-        // Determine the correct MIME type by inspecting file bytes
-        let mimeType = 'audio/mpeg' // default to MP3
-        const arrayBuffer = await blob.slice(0, 12).arrayBuffer()
-        const view = new Uint8Array(arrayBuffer)
-
-        // Check for RIFF header (WAV files start with 0x52, 0x49, 0x46, 0x46 = "RIFF")
-        if (view[0] === 0x52 && view[1] === 0x49 && view[2] === 0x46 && view[3] === 0x46) {
-          mimeType = 'audio/wav'
-        }
-        // Check for FORM header (AIFF files)
-        else if (view[0] === 0x46 && view[1] === 0x4f && view[2] === 0x52 && view[3] === 0x4d) {
-          mimeType = 'audio/x-aiff'
+        if (!mimeType) {
+          mimeType = sniffMimeType(new Uint8Array(await blob.slice(0, 12).arrayBuffer()))
         }
 
         // Create audio element with proper MIME type
@@ -69,15 +86,15 @@ export function useAudioPlayer() {
         const blobUrl = URL.createObjectURL(blob)
 
         // Use source element with proper MIME type
-        const source = document.createElement('source')
-        source.src = blobUrl
-        source.type = mimeType
-        audio.appendChild(source)
+        const sourceElement = document.createElement('source')
+        sourceElement.src = blobUrl
+        sourceElement.type = mimeType
+        audio.appendChild(sourceElement)
 
         // Cache the audio object
         audioCache.current[audioPath] = audio
 
-        console.log('Audio loaded successfully:', absolutePath, 'Format:', mimeType)
+        console.log('Audio loaded successfully:', source.url, 'Format:', mimeType)
       }
 
       currentAudio.current = audio
@@ -102,10 +119,12 @@ export function useAudioPlayer() {
           : path.startsWith('/')
             ? path
             : '/' + path
-        audio.src = absolutePath
         audio.crossOrigin = 'anonymous'
         audio.preload = 'auto'
         audioCache.current[path] = audio
+        resolveAudioSource(absolutePath).then(({ url }) => {
+          audio.src = url
+        })
       }
     })
   }, [])
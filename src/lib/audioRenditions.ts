@@ -0,0 +1,73 @@
+import { CONSTANTS } from '@/lib/constants'
+
+// Shape of public/audio-renditions/renditions.json (see scripts/build_renditions.py)
+interface RenditionFormat {
+  name: string
+  ext: string
+  mime: string
+  bitrate: string
+}
+
+interface RenditionMap {
+  version: number
+  source: string
+  base: string
+  formats: RenditionFormat[]
+  files: string[]
+}
+
+interface PlayableRenditions {
+  source: string
+  base: string
+  format: RenditionFormat
+  files: Set<string>
+}
+
+export interface AudioSource {
+  url: string
+  mimeType?: string
+}
+
+let renditionsPromise: Promise<PlayableRenditions | null> | null = null
+
+// Fetch the rendition map once per page load and pick the first format this browser can play
+export function loadRenditions(): Promise<PlayableRenditions | null> {
+  if (!renditionsPromise) {
+    renditionsPromise = fetch(CONSTANTS.AUDIO_RENDITIONS_PATH)
+      .then((response) => (response.ok ? (response.json() as Promise<RenditionMap>) : null))
+      .then((map) => {
+        if (!map) return null
+        const probe = new Audio()
+        const format = map.formats.find((f) => probe.canPlayType(f.mime) !== '')
+        return format ? { source: map.source, base: map.base, format, files: new Set(map.files) } : null
+      })
+      .catch(() => null)
+  }
+  return renditionsPromise
+}
+
+// Map an absolute /audio/... MP3 path to its compact rendition, if one was built
+export async function resolveAudioSource(absolutePath: string): Promise<AudioSource> {
+  const renditions = await loadRenditions()
+  if (!renditions || !absolutePath.startsWith(renditions.source)) {
+    return { url: absolutePath }
+  }
+
+  let relative = absolutePath.slice(renditions.source.length)
+  if (!renditions.files.has(relative)) {
+    try {
+      relative = decodeURI(relative)
+    } catch {
+      return { url: absolutePath }
+    }
+    if (!renditions.files.has(relative)) {
+      return { url: absolutePath }
+    }
+  }
+
+  const { base, format } = renditions
+  return {
+    url: `${base}${format.name}/${relative.replace(/\.mp3$/, format.ext)}`,
+    mimeType: format.mime,
+  }
+}
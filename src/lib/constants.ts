@@ -10,6 +10,7 @@ export const CONSTANTS = {
 
   // Audio
   AUDIO_PRELOAD_COUNT: 5,
+  AUDIO_RENDITIONS_PATH: '/audio-renditions/renditions.json',
 
   // Cache
   CACHE_VERSION: 'v2',